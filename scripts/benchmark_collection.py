@@ -0,0 +1,108 @@
+"""
+Collection Benchmark - AI Adoption Project
+
+Runs each AIAdoptionCollector method offline on the record/replay
+transport and reports requests/sec, end-to-end time and retry counts.
+Recorded fixtures are used where available. Other requests get synthetic
+responses with the configured latency and error rate.
+
+Usage:
+    python scripts/benchmark_collection.py
+    python scripts/benchmark_collection.py --latency 0.1 --error-rate 0.05 --countries 30
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from replay import ReplayTransport, FIXTURES_DIR, synthetic_responder
+
+METHODS = {
+    'collect_world_bank_data': lambda c: c.collect_world_bank_data(),
+    'collect_google_trends': lambda c: c.collect_google_trends('ChatGPT'),
+    'collect_google_trends_batch': lambda c: c.collect_google_trends_batch(),
+    'collect_trends_by_region': lambda c: c.collect_trends_by_region(),
+    'collect_trends_all_tools': lambda c: c.collect_trends_all_tools(),
+    'collect_github_data': lambda c: c.collect_github_data(max_pages=3)
+}
+
+
+def run_method(name, args, fixtures_dir):
+
+    from data_collection import AIAdoptionCollector
+
+    # Each method gets a fresh working directory, so no cache or journal
+    # is shared between runs; it is removed once the method has finished
+    with tempfile.TemporaryDirectory(prefix='bench_') as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            collector = AIAdoptionCollector()
+            if args.countries:
+                collector.countries = dict(list(collector.countries.items())[:args.countries])
+            # Scale the whole AIMD profile, not just the starting rate, so the
+            # limiter reacts to injected 429s the same way it would live
+            limiter = collector.trends_limiter
+            scale = args.trends_rate / limiter.rate
+            limiter.rate *= scale
+            limiter.min_rate *= scale
+            limiter.max_rate *= scale
+            limiter.increase *= scale
+
+            with ReplayTransport(fixtures_dir=fixtures_dir, latency=args.latency,
+                                 error_rate=args.error_rate, seed=args.seed,
+                                 fallback=synthetic_responder(list(collector.countries))) as transport:
+                start = time.time()
+                METHODS[name](collector)
+                elapsed = time.time() - start
+
+            retries = transport.adapter_retries + limiter.throttles + collector.github.retry_count
+            return {
+                'method': name,
+                'requests': transport.requests,
+                'seconds': round(elapsed, 2),
+                'req_per_sec': round(transport.requests / elapsed, 1) if elapsed else float('inf'),
+                'injected_errors': transport.injected_errors,
+                'retries': retries,
+                'fixture_hits': transport.fixture_hits
+            }
+        finally:
+            os.chdir(cwd)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='share of responses turned into 429s')
+    parser.add_argument('--countries', type=int, default=0, help='limit to the first N countries (0 = all)')
+    parser.add_argument('--trends-rate', type=float, default=50.0,
+                        help='starting Trends limiter rate in req/s (the live default is 0.5)')
+    parser.add_argument('--methods', nargs='*', default=list(METHODS), choices=list(METHODS))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    fixtures_dir = FIXTURES_DIR.resolve()
+
+    print("="*80)
+    print("COLLECTION BENCHMARK (record/replay transport)")
+    print("="*80)
+    print(f"Latency: {args.latency*1000:.0f} ms, error rate: {args.error_rate:.0%}, "
+          f"fixtures: {fixtures_dir if fixtures_dir.exists() else 'none (synthetic)'}")
+
+    results = []
+    for name in args.methods:
+        print(f"\n--- {name} ---")
+        results.append(run_method(name, args, fixtures_dir))
+
+    print("\n" + "="*80)
+    print(pd.DataFrame(results).to_string(index=False))
+    print("="*80)
+
+
+if __name__ == "__main__":
+    main()
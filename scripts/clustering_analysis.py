@@ -4,34 +4,54 @@ Clustering Analysis - AI Adoption Project
 K-means clustering to group countries by AI adoption patterns.
 """
 
+import argparse
+
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
 
+from consensus import ConsensusClustering
+from kmeans_sweep import sweep
+from memory_budget import MemoryReport
+from storage import load_table, save_table, iter_table, TableWriter
+
+CLUSTER_FEATURES = ['avg_interest', 'gdp_per_capita', 'internet_users_pct', 
+                    'tertiary_education', 'population']
+ID_COLUMNS = ['country_id', 'country_name', 'country_code']
+
+CONSENSUS_RESAMPLES = 200
+CONSENSUS_FRACTION = 0.8
+STREAMING_EPOCHS = 3
+
+def name_clusters(n_clusters):
+    
+    cluster_names = {
+        0: 'Early Adopters',
+        1: 'Fast Followers',
+        2: 'Moderate Users',
+        3: 'Laggards'
+    }
+    cluster_names.update({i: f'Cluster {i}' for i in range(n_clusters) if i not in cluster_names})
+    return cluster_names
+
 def load_data():
     
-    df = pd.read_csv('data/processed/ai_adoption_cleaned.csv')
+    df = load_table('cleaned', columns=CLUSTER_FEATURES + ID_COLUMNS)
     print(f"Loaded {len(df)} countries\n")
     return df
 
-def find_optimal_clusters(X_scaled, max_k=8):
+def find_optimal_clusters(X_scaled, max_k=8, workers=None):
     
     print("Finding optimal number of clusters...")
     
-    inertias = []
-    silhouette_scores = []
     K_range = range(2, max_k+1)
-    
-    for k in K_range:
-        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        kmeans.fit(X_scaled)
-        inertias.append(kmeans.inertia_)
-        silhouette_scores.append(silhouette_score(X_scaled, kmeans.labels_))
+    fits = sweep(X_scaled, list(K_range), random_state=42, n_init=10, workers=workers)
+    inertias = [fits[k]['inertia'] for k in K_range]
+    silhouette_scores = [fits[k]['silhouette'] for k in K_range]
     
     fig = go.Figure()
     
@@ -67,32 +87,33 @@ def find_optimal_clusters(X_scaled, max_k=8):
     best_k = K_range[np.argmax(silhouette_scores)]
     print(f"Recommended clusters: {best_k} (Silhouette: {max(silhouette_scores):.3f})")
     
-    return best_k
+    return best_k, fits
 
-def perform_clustering(df, n_clusters=4):
-    
-    print(f"\nK-Means Clustering (k={n_clusters})...")
-    
-    feature_cols = ['avg_interest', 'gdp_per_capita', 'internet_users_pct', 
-                    'tertiary_education', 'population']
-    
-    df_cluster = df[feature_cols + ['country_name', 'country_code']].dropna()
-    
-    X = df_cluster[feature_cols]
+def prepare_features(df):
     
+    # One scaled matrix shared by the k sweep and the final clustering
+    # Countries outside the registry have no country_id but are still clustered
+    df_cluster = df[CLUSTER_FEATURES + ID_COLUMNS].dropna(subset=CLUSTER_FEATURES + ID_COLUMNS[1:])
     scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    X_scaled = scaler.fit_transform(df_cluster[CLUSTER_FEATURES])
+    return df_cluster, scaler, X_scaled
+
+def perform_clustering(df, n_clusters=4, fit=None, scaler=None, X_scaled=None):
     
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    df_cluster['cluster'] = kmeans.fit_predict(X_scaled)
+    print(f"\nK-Means Clustering (k={n_clusters})...")
     
-    cluster_names = {
-        0: 'Early Adopters',
-        1: 'Fast Followers',
-        2: 'Moderate Users',
-        3: 'Laggards'
-    }
+    if X_scaled is None:
+        df_cluster, scaler, X_scaled = prepare_features(df)
+    else:
+        df_cluster = df
+    
+    # Reuse the sweep's fit for this k; otherwise fit (or load it from the cache)
+    if fit is None:
+        fit = sweep(X_scaled, [n_clusters], random_state=42, n_init=10, workers=1)[n_clusters]
+    kmeans = fit['model']
+    df_cluster['cluster'] = kmeans.labels_
     
+    cluster_names = name_clusters(n_clusters)
     df_cluster['cluster_name'] = df_cluster['cluster'].map(cluster_names)
     
     print("\nCluster Statistics:")
@@ -108,8 +129,11 @@ def perform_clustering(df, n_clusters=4):
         if len(cluster_data) > 5:
             print(f"           ... and {len(cluster_data)-5} more")
     
-    silhouette_avg = silhouette_score(X_scaled, df_cluster['cluster'])
-    print(f"\nOverall Silhouette Score: {silhouette_avg:.3f}")
+    silhouette_avg = fit['silhouette']
+    if fit['silhouette_sampled']:
+        print(f"\nOverall Silhouette Score: {silhouette_avg:.3f} ± {fit['silhouette_se']:.3f} (sampled)")
+    else:
+        print(f"\nOverall Silhouette Score: {silhouette_avg:.3f}")
     
     return df_cluster, kmeans, scaler, X_scaled
 
@@ -162,35 +186,174 @@ def visualize_clusters(df_cluster):
     
     return fig1, fig2
 
+def consensus_analysis(df_cluster, X_scaled, n_clusters, n_resamples=CONSENSUS_RESAMPLES):
+    
+    print(f"\nConsensus clustering ({n_resamples} subsamples of {CONSENSUS_FRACTION:.0%})...")
+    
+    consensus = ConsensusClustering(n_clusters, n_resamples=n_resamples, fraction=CONSENSUS_FRACTION)
+    consensus.fit(X_scaled, reference_labels=df_cluster['cluster'].to_numpy())
+    table, clusters = consensus.summary(df_cluster['cluster'].to_numpy(), index=df_cluster.index)
+    
+    clusters.index = clusters.index.map(df_cluster.groupby('cluster')['cluster_name'].first())
+    print("\nCluster Stability (mean co-assignment with own cluster):")
+    print(clusters.round(3).to_string())
+    
+    stability = df_cluster[['country_code', 'country_name', 'cluster', 'cluster_name']].join(
+        table[['consensus_cluster', 'stability']])
+    unstable = stability.nsmallest(5, 'stability')
+    print("\nLeast stable assignments:")
+    for _, row in unstable.iterrows():
+        print(f"  {row['country_name']:20s}: {row['cluster_name']:15s} stability={row['stability']:.2f}")
+    
+    output_path = Path('data/processed/cluster_stability.csv')
+    stability.to_csv(output_path, index=False)
+    print(f"\nStability table saved: {output_path}")
+    
+    return stability, consensus
+
 def save_clustered_data(df_cluster):
     
-    output_path = Path('data/processed/ai_adoption_clustered.csv')
-    df_cluster.to_csv(output_path, index=False)
+    output_path = save_table(df_cluster, 'clustered')
     print(f"\nClustered data saved: {output_path}")
     return output_path
 
-def main():
+def iter_features(stage, chunksize):
     
-    df = load_data()
+    # Complete rows only, as in prepare_features
+    for chunk in iter_table(stage, chunksize, columns=CLUSTER_FEATURES + ID_COLUMNS):
+        chunk = chunk.dropna(subset=CLUSTER_FEATURES + ID_COLUMNS[1:])
+        if len(chunk):
+            yield chunk
+
+def cluster_streaming(chunksize, n_clusters=4, stage='cleaned', epochs=STREAMING_EPOCHS, report=None):
     
-    feature_cols = ['avg_interest', 'gdp_per_capita', 'internet_users_pct', 
-                    'tertiary_education', 'population']
-    df_scaled = df[feature_cols].dropna()
+    print(f"\nStreaming MiniBatch K-Means (k={n_clusters}) in chunks of {chunksize:,} rows...")
     
+    # Pass 1: online standardizer (running mean and variance per feature)
     scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(df_scaled)
+    for chunk in iter_features(stage, chunksize):
+        scaler.partial_fit(chunk[CLUSTER_FEATURES].to_numpy(dtype=np.float64))
+    if not hasattr(scaler, 'n_samples_seen_'):
+        print("No complete rows to cluster")
+        return None
+    rows = int(scaler.n_samples_seen_)
+    print(f"Scanned {rows:,} complete rows")
+    if report is not None:
+        report.step('standardize')
+    
+    # Pass 2: mini-batch updates of the centroids, a few epochs over the
+    # chunks. A chunk smaller than k (possible only at the end of a pass)
+    # is held back and merged into the next one, or flushed at the end
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3,
+                             batch_size=min(chunksize, 4096))
+    held = None
+    for _ in range(epochs):
+        for chunk in iter_features(stage, chunksize):
+            X = scaler.transform(chunk[CLUSTER_FEATURES].to_numpy(dtype=np.float64))
+            if held is not None:
+                X, held = np.vstack([held, X]), None
+            if len(X) < n_clusters:
+                held = X
+                continue
+            kmeans.partial_fit(X)
+    # Rows still held after the last epoch: once the centroids exist a
+    # batch of any size can update them
+    if held is not None and hasattr(kmeans, 'cluster_centers_'):
+        kmeans.partial_fit(held)
+    if not hasattr(kmeans, 'cluster_centers_'):
+        print(f"Fewer than {n_clusters} complete rows; cannot cluster")
+        return None
+    if report is not None:
+        report.step('fit')
+    
+    # Pass 3: assign every row and write it out, keeping only per-cluster
+    # running sums for the summary
+    cluster_names = name_clusters(n_clusters)
+    counts = np.zeros(n_clusters)
+    sums = np.zeros((n_clusters, 3))
+    sq_interest = np.zeros(n_clusters)
+    examples = {i: [] for i in range(n_clusters)}
+    inertia = 0.0
+    chunk = None
+    with TableWriter('clustered') as writer:
+        for chunk in iter_features(stage, chunksize):
+            X = scaler.transform(chunk[CLUSTER_FEATURES].to_numpy(dtype=np.float64))
+            labels = kmeans.predict(X)
+            inertia += ((X - kmeans.cluster_centers_[labels]) ** 2).sum()
+            chunk = chunk.assign(cluster=labels, cluster_name=pd.Series(labels, index=chunk.index).map(cluster_names))
+            writer.write(chunk[CLUSTER_FEATURES + ID_COLUMNS + ['cluster', 'cluster_name']])
+            
+            values = chunk[['avg_interest', 'gdp_per_capita', 'internet_users_pct']].to_numpy(dtype=np.float64)
+            counts += np.bincount(labels, minlength=n_clusters)
+            for j in range(3):
+                sums[:, j] += np.bincount(labels, weights=values[:, j], minlength=n_clusters)
+            sq_interest += np.bincount(labels, weights=values[:, 0] ** 2, minlength=n_clusters)
+            for cluster_id in range(n_clusters):
+                if len(examples[cluster_id]) < 5:
+                    # Panel rows repeat countries; list distinct names
+                    names = chunk.loc[labels == cluster_id, 'country_name'].drop_duplicates()
+                    names = names[~names.isin(examples[cluster_id])].head(5 - len(examples[cluster_id]))
+                    examples[cluster_id].extend(names.tolist())
+    if report is not None:
+        report.step('assign+write (last chunk)', chunk)
+    
+    print("\nCluster Statistics:")
+    print("="*80)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts[:, None]
+        std_interest = np.sqrt(np.maximum(sq_interest - counts * means[:, 0] ** 2, 0) / (counts - 1))
+    for cluster_id in range(n_clusters):
+        print(f"\n{cluster_names[cluster_id]} (n={int(counts[cluster_id]):,}):")
+        print(f"  AI Interest: {means[cluster_id, 0]:.2f} ± {std_interest[cluster_id]:.2f}")
+        print(f"  GDP: ${means[cluster_id, 1]:.0f}")
+        print(f"  Internet: {means[cluster_id, 2]:.1f}%")
+        print(f"  Countries: {', '.join(examples[cluster_id])}")
+    
+    print(f"\nInertia: {inertia:,.1f}")
+    print(f"Clustered data saved: {writer.path}")
+    return writer.rows
+
+def main(df=None, consensus_resamples=0, chunksize=None, n_clusters=4, memory_report=False):
+    
+    if chunksize:
+        # Streaming mode for tables too large for memory: no k sweep or
+        # plots, same clustered table
+        with MemoryReport(enabled=memory_report) as report:
+            rows = cluster_streaming(chunksize, n_clusters, report=report)
+            report.print_report()
+        return rows
+    
+    if df is None:
+        df = load_data()
     
-    best_k = find_optimal_clusters(X_scaled)
+    df_cluster, scaler, X_scaled = prepare_features(df)
     
-    df_cluster, kmeans, scaler, X_scaled = perform_clustering(df, n_clusters=4)
+    best_k, fits = find_optimal_clusters(X_scaled)
+    
+    df_cluster, kmeans, scaler, X_scaled = perform_clustering(df_cluster, n_clusters=best_k, fit=fits[best_k],
+                                                              scaler=scaler, X_scaled=X_scaled)
     
     visualize_clusters(df_cluster)
     
+    if consensus_resamples:
+        consensus_analysis(df_cluster, X_scaled, best_k, consensus_resamples)
+    
     save_clustered_data(df_cluster)
     
     print("\n" + "="*80)
     print("CLUSTERING ANALYSIS COMPLETE")
     print("="*80)
+    
+    return df_cluster
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="K-means clustering of countries by AI adoption patterns.")
+    parser.add_argument('--consensus', type=int, nargs='?', const=CONSENSUS_RESAMPLES, default=0, metavar='N',
+                        help=f'also refit on N subsamples and report cluster stability (default {CONSENSUS_RESAMPLES})')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream the cleaned table in chunks of this many rows (MiniBatch K-Means)')
+    parser.add_argument('--clusters', type=int, default=4, help='number of clusters in streaming mode')
+    parser.add_argument('--memory-report', action='store_true', help='report memory per step in streaming mode')
+    args = parser.parse_args()
+    main(consensus_resamples=args.consensus, chunksize=args.chunksize, n_clusters=args.clusters,
+         memory_report=args.memory_report)
@@ -0,0 +1,143 @@
+"""
+Consensus Clustering - AI Adoption Project
+
+How stable is a K-means partition? KMeans is refitted on hundreds of
+random subsamples of the countries, in parallel over the shared-memory
+pool from kmeans_sweep. The co-association matrix (how often two
+countries land in the same cluster, out of the fits that contain both) is
+accumulated batch by batch. Each batch is a one-hot (countries x fits*k)
+matrix, so the update is a single matrix product rather than a loop over
+pairs. Memory is two n x n counters plus one batch, however many
+resamples are run. The consensus partition cuts an average-linkage tree
+on 1 - consensus. A country's stability is its mean consensus with the
+other members of its cluster.
+"""
+
+import os
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial.distance import squareform
+from sklearn.cluster import KMeans
+
+from kmeans_sweep import shared_matrix, shared_pool
+
+
+def fit_resamples(X, k, seeds, fraction, n_init):
+
+    # One (rows, labels) pair per seed, each from a fresh subsample
+    n = len(X)
+    size = max(k, int(round(fraction * n)))
+    fits = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(n, size, replace=False))
+        labels = KMeans(n_clusters=k, n_init=n_init, random_state=int(rng.integers(2**31))).fit_predict(X[rows])
+        fits.append((rows, labels))
+    return fits
+
+
+def _fit_resamples_shared(k, seeds, fraction, n_init):
+    return fit_resamples(shared_matrix(), k, seeds, fraction, n_init)
+
+
+class ConsensusClustering:
+
+    def __init__(self, n_clusters, n_resamples=200, fraction=0.8, n_init=3, workers=None,
+                 batch_size=25, seed=42):
+        self.n_clusters = n_clusters
+        self.n_resamples = n_resamples
+        self.fraction = fraction
+        self.n_init = n_init
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.seed = seed
+
+    def _accumulate(self, fits, n):
+
+        # Rows outside a fit's subsample are all-zero in its one-hot block
+        k = self.n_clusters
+        H = np.zeros((n, len(fits) * k), dtype=np.float32)
+        S = np.zeros((n, len(fits)), dtype=np.float32)
+        for f, (rows, labels) in enumerate(fits):
+            H[rows, f * k + labels] = 1
+            S[rows, f] = 1
+        self.together += H @ H.T
+        self.sampled += S @ S.T
+
+    def fit(self, X, reference_labels=None):
+
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n = len(X)
+        self.together = np.zeros((n, n), dtype=np.float32)
+        self.sampled = np.zeros((n, n), dtype=np.float32)
+
+        seeds = np.random.SeedSequence(self.seed).spawn(self.n_resamples)
+        batches = [seeds[i:i + self.batch_size] for i in range(0, len(seeds), self.batch_size)]
+
+        if self.workers <= 1 or len(batches) == 1:
+            for batch in batches:
+                self._accumulate(fit_resamples(X, self.n_clusters, batch, self.fraction, self.n_init), n)
+        else:
+            with shared_pool(X, min(self.workers, len(batches))) as pool:
+                # Submitted in waves so finished batches never pile up
+                wave = self.workers * 2
+                for start in range(0, len(batches), wave):
+                    chunk = batches[start:start + wave]
+                    for fits in pool.map(_fit_resamples_shared, repeat(self.n_clusters), chunk,
+                                         repeat(self.fraction), repeat(self.n_init)):
+                        self._accumulate(fits, n)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.consensus_ = self.together / self.sampled
+        np.fill_diagonal(self.consensus_, 1)
+
+        # Consensus partition: average linkage on 1 - consensus, with pairs
+        # never sampled together treated as never co-clustered
+        distance = 1 - np.nan_to_num(self.consensus_, nan=0.0)
+        tree = linkage(squareform(distance, checks=False), method='average')
+        self.labels_ = fcluster(tree, self.n_clusters, criterion='maxclust') - 1
+        if reference_labels is not None:
+            self.labels_ = self._align(self.labels_, np.asarray(reference_labels))
+        return self
+
+    def _align(self, labels, reference):
+
+        # Renumber consensus clusters to best match the reference partition
+        size = max(labels.max(), reference.max()) + 1
+        overlap = np.zeros((size, size))
+        np.add.at(overlap, (labels, reference), 1)
+        rows, cols = linear_sum_assignment(-overlap)
+        mapping = dict(zip(rows, cols))
+        return np.array([mapping[label] for label in labels])
+
+    def stability(self, labels):
+
+        # Mean consensus of each item with the other members of its cluster
+        labels = np.asarray(labels)
+        same = labels[:, None] == labels[None, :]
+        np.fill_diagonal(same, False)
+        consensus = np.where(same, self.consensus_, np.nan)
+        with np.errstate(invalid='ignore'):
+            item = np.nanmean(consensus, axis=1)
+        # Singletons have no partner, so their stability is undefined
+        item[same.sum(axis=1) == 0] = np.nan
+        return item
+
+    def summary(self, labels, index=None):
+
+        labels = np.asarray(labels)
+        table = pd.DataFrame({
+            'cluster': labels,
+            'consensus_cluster': self.labels_,
+            'stability': self.stability(labels)
+        }, index=index)
+        clusters = table.groupby('cluster').agg(
+            countries=('stability', 'size'), mean_stability=('stability', 'mean'),
+            min_stability=('stability', 'min'))
+        clusters['agreement'] = table.assign(
+            agree=table['cluster'] == table['consensus_cluster']).groupby('cluster')['agree'].mean()
+        return table, clusters
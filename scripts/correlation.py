@@ -0,0 +1,178 @@
+"""
+Correlation Engine - AI Adoption Project
+
+Pearson, Spearman and Kendall correlations with pairwise-complete missing
+values, without a loop over column pairs. Every column is ranked once.
+Spearman is Pearson on those ranks (taken over each column's available
+values, so with missing data it can differ slightly from re-ranking
+every pair's common rows). Pearson is built from masked matrix products:
+the pair counts, sums and cross-products of every column pair are a few
+(n x p)' (n x q) products. Kendall's tau-b accumulates the signs of all
+row-pair differences block by block as one more matrix product. A
+correlation matrix or a screen of hundreds of indicators against
+avg_interest costs a handful of BLAS calls. Results are cached under a
+hash of the data; only the most recently used entries are kept on disk.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('pearson', 'spearman', 'kendall')
+CACHE_DIR = Path("data/processed/.correlation_cache")
+CACHE_ENTRIES = 16
+
+
+def numeric_frame(data):
+
+    # Booleans (imputation flags) are not indicators
+    columns = [col for col in data.columns
+               if pd.api.types.is_numeric_dtype(data[col]) and not pd.api.types.is_bool_dtype(data[col])]
+    return data[columns].astype('float64')
+
+
+def masked_corr(A, B):
+
+    # Pearson r of every column of A with every column of B over the rows
+    # where both are present. A: (n, p), B: (n, q), NaN for missing
+    MA, MB = ~np.isnan(A), ~np.isnan(B)
+    # Centring on the column means first keeps the sums well conditioned
+    A0 = np.where(MA, A - np.nanmean(A, axis=0), 0.0)
+    B0 = np.where(MB, B - np.nanmean(B, axis=0), 0.0)
+    MA, MB = MA.astype(np.float64), MB.astype(np.float64)
+
+    n = MA.T @ MB
+    sum_a, sum_b = A0.T @ MB, MA.T @ B0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = A0.T @ B0 - sum_a * sum_b / n
+        var_a = (A0 ** 2).T @ MB - sum_a ** 2 / n
+        var_b = MA.T @ (B0 ** 2) - sum_b ** 2 / n
+        r = cov / np.sqrt(var_a * var_b)
+    r[(n < 2) | ~(var_a > 1e-12) | ~(var_b > 1e-12)] = np.nan
+    return np.clip(r, -1, 1), n.astype(np.int64)
+
+
+def kendall_tau_b(A, B, block_elements=2_000_000):
+
+    # tau-b of every column of A with every column of B. For each block of
+    # rows, the signs of the differences to every later row form a
+    # (pairs, columns) matrix, zero where either value is missing; the
+    # concordance sums and tie-adjusted pair counts are then matrix products
+    n = len(A)
+    concordance = np.zeros((A.shape[1], B.shape[1]))
+    untied_a = np.zeros_like(concordance)
+    untied_b = np.zeros_like(concordance)
+    block = max(1, block_elements // max(1, n * (A.shape[1] + B.shape[1])))
+
+    for start in range(0, n - 1, block):
+        rows = np.arange(start, min(start + block, n - 1))
+        later = np.arange(n)[None, :] > rows[:, None]
+
+        with np.errstate(invalid='ignore'):
+            da = A[rows][:, None, :] - A[None, :, :]
+            db = B[rows][:, None, :] - B[None, :, :]
+        da, db = da[later], db[later]
+        va, vb = ~np.isnan(da), ~np.isnan(db)
+        sa, sb = np.sign(np.where(va, da, 0.0)), np.sign(np.where(vb, db, 0.0))
+
+        concordance += sa.T @ sb
+        untied_a += (sa ** 2).T @ vb
+        untied_b += va.T.astype(np.float64) @ (sb ** 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = concordance / np.sqrt(untied_a * untied_b)
+    return np.clip(tau, -1, 1)
+
+
+class CorrelationEngine:
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=CACHE_ENTRIES):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self._cache = {}
+
+    @staticmethod
+    def data_key(data, *parts):
+        digest = hashlib.sha256(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        digest.update(repr((list(data.columns), parts)).encode())
+        return digest.hexdigest()
+
+    def _cached(self, key, compute):
+
+        if key in self._cache:
+            return self._cache[key]
+        path = self.cache_dir / f"{key}.pkl" if self.cache_dir else None
+        if path is not None and path.exists():
+            result = pickle.loads(path.read_bytes())
+            # Mark as recently used, so pruning keeps it
+            os.utime(path)
+        else:
+            result = compute()
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix('.tmp')
+                tmp.write_bytes(pickle.dumps(result))
+                os.replace(tmp, path)
+                self._prune()
+        self._cache[key] = result
+        return result
+
+    def _prune(self):
+
+        # Every re-clean hashes to new keys; drop all but the newest entries
+        entries = sorted(self.cache_dir.glob("*.pkl"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in entries[self.max_entries:]:
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _compute(A, B, methods):
+
+        result = {}
+        if 'pearson' in methods:
+            result['pearson'], result['n'] = masked_corr(A, B)
+        if 'spearman' in methods:
+            # One ranking pass over every column (missing values stay NaN),
+            # shared by both sides when B is a slice of the same data
+            ranks_a = pd.DataFrame(A).rank().to_numpy()
+            ranks_b = ranks_a if B is A else pd.DataFrame(B).rank().to_numpy()
+            result['spearman'], result['n'] = masked_corr(ranks_a, ranks_b)
+        if 'kendall' in methods:
+            result['kendall'] = kendall_tau_b(A, B)
+            if 'n' not in result:
+                result['n'] = (~np.isnan(A)).T.astype(np.int64) @ (~np.isnan(B))
+        return result
+
+    def matrices(self, data, methods=METHODS):
+
+        # Full correlation matrix per method, plus the pairwise counts
+        data = numeric_frame(data)
+        columns = list(data.columns)
+
+        def compute():
+            X = data.to_numpy(dtype=np.float64, na_value=np.nan)
+            result = self._compute(X, X, methods)
+            return {name: pd.DataFrame(values, index=columns, columns=columns)
+                    for name, values in result.items()}
+
+        return self._cached(self.data_key(data, 'matrices', tuple(methods)), compute)
+
+    def against(self, data, target='avg_interest', methods=METHODS):
+
+        # Every indicator against one target: O(n p) for Pearson and Spearman
+        data = numeric_frame(data)
+        indicators = [col for col in data.columns if col != target]
+
+        def compute():
+            A = data[indicators].to_numpy(dtype=np.float64, na_value=np.nan)
+            B = data[[target]].to_numpy(dtype=np.float64, na_value=np.nan)
+            result = self._compute(A, B, methods)
+            table = pd.DataFrame({name: values[:, 0] for name, values in result.items()}, index=indicators)
+            table.index.name = 'indicator'
+            order = table[methods[0]].abs().sort_values(ascending=False).index
+            return table.loc[order]
+
+        return self._cached(self.data_key(data, 'against', target, tuple(methods)), compute)
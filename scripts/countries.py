@@ -0,0 +1,195 @@
+"""
+Country Registry - AI Adoption Project
+
+The single definition of the country universe: one row per country with
+its ISO2/ISO3 codes, name, region and continent. Each country gets an
+integer ID (its row), and the registry holds hash indexes on ISO2, ISO3
+and name. Regions and continents are stored as categorical codes, so
+annotating a frame is one index lookup followed by array takes instead
+of a dict .map() per column.
+"""
+
+import numpy as np
+import pandas as pd
+
+# (iso2, iso3, name, region, continent)
+COUNTRY_TABLE = [
+    ('US', 'USA', 'United States', 'North America', 'Americas'),
+    ('CA', 'CAN', 'Canada', 'North America', 'Americas'),
+    ('MX', 'MEX', 'Mexico', 'North America', 'Americas'),
+    ('BR', 'BRA', 'Brazil', 'South America', 'Americas'),
+    ('AR', 'ARG', 'Argentina', 'South America', 'Americas'),
+    ('CO', 'COL', 'Colombia', 'South America', 'Americas'),
+    ('CL', 'CHL', 'Chile', 'South America', 'Americas'),
+    ('PE', 'PER', 'Peru', 'South America', 'Americas'),
+    ('VE', 'VEN', 'Venezuela', 'South America', 'Americas'),
+    ('EC', 'ECU', 'Ecuador', 'South America', 'Americas'),
+    ('UY', 'URY', 'Uruguay', 'South America', 'Americas'),
+    ('GB', 'GBR', 'United Kingdom', 'Western Europe', 'Europe'),
+    ('DE', 'DEU', 'Germany', 'Western Europe', 'Europe'),
+    ('FR', 'FRA', 'France', 'Western Europe', 'Europe'),
+    ('IT', 'ITA', 'Italy', 'Western Europe', 'Europe'),
+    ('ES', 'ESP', 'Spain', 'Western Europe', 'Europe'),
+    ('NL', 'NLD', 'Netherlands', 'Western Europe', 'Europe'),
+    ('BE', 'BEL', 'Belgium', 'Western Europe', 'Europe'),
+    ('CH', 'CHE', 'Switzerland', 'Western Europe', 'Europe'),
+    ('AT', 'AUT', 'Austria', 'Western Europe', 'Europe'),
+    ('IE', 'IRL', 'Ireland', 'Western Europe', 'Europe'),
+    ('PT', 'PRT', 'Portugal', 'Western Europe', 'Europe'),
+    ('GR', 'GRC', 'Greece', 'Western Europe', 'Europe'),
+    ('SE', 'SWE', 'Sweden', 'Northern Europe', 'Europe'),
+    ('NO', 'NOR', 'Norway', 'Northern Europe', 'Europe'),
+    ('DK', 'DNK', 'Denmark', 'Northern Europe', 'Europe'),
+    ('FI', 'FIN', 'Finland', 'Northern Europe', 'Europe'),
+    ('IS', 'ISL', 'Iceland', 'Northern Europe', 'Europe'),
+    ('PL', 'POL', 'Poland', 'Eastern Europe', 'Europe'),
+    ('CZ', 'CZE', 'Czech Republic', 'Eastern Europe', 'Europe'),
+    ('HU', 'HUN', 'Hungary', 'Eastern Europe', 'Europe'),
+    ('RO', 'ROU', 'Romania', 'Eastern Europe', 'Europe'),
+    ('BG', 'BGR', 'Bulgaria', 'Eastern Europe', 'Europe'),
+    ('SK', 'SVK', 'Slovakia', 'Eastern Europe', 'Europe'),
+    ('HR', 'HRV', 'Croatia', 'Eastern Europe', 'Europe'),
+    ('SI', 'SVN', 'Slovenia', 'Eastern Europe', 'Europe'),
+    ('RS', 'SRB', 'Serbia', 'Eastern Europe', 'Europe'),
+    ('LT', 'LTU', 'Lithuania', 'Eastern Europe', 'Europe'),
+    ('LV', 'LVA', 'Latvia', 'Eastern Europe', 'Europe'),
+    ('EE', 'EST', 'Estonia', 'Eastern Europe', 'Europe'),
+    ('UA', 'UKR', 'Ukraine', 'Eastern Europe', 'Europe'),
+    ('BY', 'BLR', 'Belarus', 'Eastern Europe', 'Europe'),
+    ('CN', 'CHN', 'China', 'East Asia', 'Asia'),
+    ('JP', 'JPN', 'Japan', 'East Asia', 'Asia'),
+    ('KR', 'KOR', 'South Korea', 'East Asia', 'Asia'),
+    ('TW', 'TWN', 'Taiwan', 'East Asia', 'Asia'),
+    ('HK', 'HKG', 'Hong Kong', 'East Asia', 'Asia'),
+    ('MN', 'MNG', 'Mongolia', 'East Asia', 'Asia'),
+    ('ID', 'IDN', 'Indonesia', 'Southeast Asia', 'Asia'),
+    ('TH', 'THA', 'Thailand', 'Southeast Asia', 'Asia'),
+    ('VN', 'VNM', 'Vietnam', 'Southeast Asia', 'Asia'),
+    ('PH', 'PHL', 'Philippines', 'Southeast Asia', 'Asia'),
+    ('MY', 'MYS', 'Malaysia', 'Southeast Asia', 'Asia'),
+    ('SG', 'SGP', 'Singapore', 'Southeast Asia', 'Asia'),
+    ('MM', 'MMR', 'Myanmar', 'Southeast Asia', 'Asia'),
+    ('KH', 'KHM', 'Cambodia', 'Southeast Asia', 'Asia'),
+    ('LA', 'LAO', 'Laos', 'Southeast Asia', 'Asia'),
+    ('IN', 'IND', 'India', 'South Asia', 'Asia'),
+    ('PK', 'PAK', 'Pakistan', 'South Asia', 'Asia'),
+    ('BD', 'BGD', 'Bangladesh', 'South Asia', 'Asia'),
+    ('LK', 'LKA', 'Sri Lanka', 'South Asia', 'Asia'),
+    ('NP', 'NPL', 'Nepal', 'South Asia', 'Asia'),
+    ('AF', 'AFG', 'Afghanistan', 'South Asia', 'Asia'),
+    ('TR', 'TUR', 'Turkey', 'Middle East', 'Asia'),
+    ('SA', 'SAU', 'Saudi Arabia', 'Middle East', 'Asia'),
+    ('AE', 'ARE', 'United Arab Emirates', 'Middle East', 'Asia'),
+    ('IL', 'ISR', 'Israel', 'Middle East', 'Asia'),
+    ('IR', 'IRN', 'Iran', 'Middle East', 'Asia'),
+    ('IQ', 'IRQ', 'Iraq', 'Middle East', 'Asia'),
+    ('EG', 'EGY', 'Egypt', 'Middle East', 'Africa'),
+    ('JO', 'JOR', 'Jordan', 'Middle East', 'Asia'),
+    ('LB', 'LBN', 'Lebanon', 'Middle East', 'Asia'),
+    ('KW', 'KWT', 'Kuwait', 'Middle East', 'Asia'),
+    ('QA', 'QAT', 'Qatar', 'Middle East', 'Asia'),
+    ('OM', 'OMN', 'Oman', 'Middle East', 'Asia'),
+    ('BH', 'BHR', 'Bahrain', 'Middle East', 'Asia'),
+    ('YE', 'YEM', 'Yemen', 'Middle East', 'Asia'),
+    ('MA', 'MAR', 'Morocco', 'North Africa', 'Africa'),
+    ('DZ', 'DZA', 'Algeria', 'North Africa', 'Africa'),
+    ('TN', 'TUN', 'Tunisia', 'North Africa', 'Africa'),
+    ('LY', 'LBY', 'Libya', 'North Africa', 'Africa'),
+    ('NG', 'NGA', 'Nigeria', 'West Africa', 'Africa'),
+    ('GH', 'GHA', 'Ghana', 'West Africa', 'Africa'),
+    ('CI', 'CIV', 'Ivory Coast', 'West Africa', 'Africa'),
+    ('SN', 'SEN', 'Senegal', 'West Africa', 'Africa'),
+    ('KE', 'KEN', 'Kenya', 'East Africa', 'Africa'),
+    ('ET', 'ETH', 'Ethiopia', 'East Africa', 'Africa'),
+    ('TZ', 'TZA', 'Tanzania', 'East Africa', 'Africa'),
+    ('UG', 'UGA', 'Uganda', 'East Africa', 'Africa'),
+    ('ZA', 'ZAF', 'South Africa', 'Southern Africa', 'Africa'),
+    ('ZW', 'ZWE', 'Zimbabwe', 'Southern Africa', 'Africa'),
+    ('BW', 'BWA', 'Botswana', 'Southern Africa', 'Africa'),
+    ('NA', 'NAM', 'Namibia', 'Southern Africa', 'Africa'),
+    ('AU', 'AUS', 'Australia', 'Oceania', 'Oceania'),
+    ('NZ', 'NZL', 'New Zealand', 'Oceania', 'Oceania'),
+    ('FJ', 'FJI', 'Fiji', 'Oceania', 'Oceania'),
+    ('PG', 'PNG', 'Papua New Guinea', 'Oceania', 'Oceania'),
+    ('RU', 'RUS', 'Russia', 'Russia & Central Asia', 'Europe'),
+    ('KZ', 'KAZ', 'Kazakhstan', 'Russia & Central Asia', 'Asia'),
+    ('UZ', 'UZB', 'Uzbekistan', 'Russia & Central Asia', 'Asia'),
+    ('GE', 'GEO', 'Georgia', 'Russia & Central Asia', 'Asia'),
+    ('AZ', 'AZE', 'Azerbaijan', 'Russia & Central Asia', 'Asia'),
+    ('AM', 'ARM', 'Armenia', 'Russia & Central Asia', 'Asia')
+]
+
+
+class CountryRegistry:
+
+    def __init__(self, rows):
+        iso2, iso3, names, regions, continents = zip(*rows)
+        self.ids = np.arange(len(rows), dtype=np.int32)
+        self.iso2 = pd.Index(iso2, dtype='string')
+        self.iso3 = pd.Index(iso3, dtype='string')
+        self.names = pd.Index(names, dtype='string')
+        self.region = pd.Categorical(regions)
+        self.continent = pd.Categorical(continents)
+
+        for key in ('iso2', 'iso3', 'names'):
+            index = getattr(self, key)
+            if not index.is_unique:
+                raise ValueError(f"Duplicate {key} in country table: {list(index[index.duplicated()])}")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def country_ids(self, values, key='iso2'):
+
+        # -1 marks values that are not in the registry
+        index = {'iso2': self.iso2, 'iso3': self.iso3, 'name': self.names}[key]
+        return index.get_indexer(pd.Index(values, dtype='string'))
+
+    def name_map(self):
+        return dict(zip(self.iso2, self.names))
+
+    def frame(self):
+
+        return pd.DataFrame({
+            'country_id': self.ids,
+            'country_code': self.iso2,
+            'country_code_iso3': self.iso3,
+            'country_name': self.names,
+            'region': self.region,
+            'continent': self.continent
+        })
+
+    def annotate(self, df, code_col='country_code'):
+
+        ids = self.country_ids(df[code_col])
+
+        # Rows whose code was lost are matched by name instead (older CSVs
+        # read Namibia's 'NA' as missing)
+        if 'country_name' in df.columns and (ids < 0).any():
+            by_name = self.country_ids(df['country_name'], key='name')
+            recovered = (ids < 0) & (by_name >= 0)
+            if recovered.any():
+                ids = np.where(recovered, by_name, ids)
+                codes = pd.array(df[code_col], dtype='string')
+                codes[recovered] = self.iso2.take(by_name[recovered])
+                df[code_col] = codes
+
+        known = ids >= 0
+        safe_ids = np.where(known, ids, 0)
+
+        # Small integer key for joins and group-bys; missing when unknown
+        country_id = pd.array(ids, dtype='Int16')
+        country_id[~known] = pd.NA
+        df['country_id'] = country_id
+
+        iso3 = pd.array(self.iso3.take(safe_ids), dtype='string')
+        iso3[~known] = pd.NA
+        df['country_code_iso3'] = iso3
+        df['region'] = pd.Categorical.from_codes(
+            np.where(known, self.region.codes[safe_ids], -1), self.region.categories)
+        df['continent'] = pd.Categorical.from_codes(
+            np.where(known, self.continent.codes[safe_ids], -1), self.continent.categories)
+        return df
+
+
+REGISTRY = CountryRegistry(COUNTRY_TABLE)
@@ -4,139 +4,71 @@ Data Cleaning Script - AI Adoption Project
 Cleans and prepares collected data for analysis.
 """
 
+import argparse
+import json
+import os
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
-ISO_CODE_MAP = {
-    'US': 'USA', 'CA': 'CAN', 'MX': 'MEX',
-    'BR': 'BRA', 'AR': 'ARG', 'CO': 'COL', 'CL': 'CHL', 'PE': 'PER', 
-    'VE': 'VEN', 'EC': 'ECU', 'UY': 'URY',
-    'GB': 'GBR', 'DE': 'DEU', 'FR': 'FRA', 'IT': 'ITA', 'ES': 'ESP', 
-    'NL': 'NLD', 'BE': 'BEL', 'CH': 'CHE', 'AT': 'AUT', 'IE': 'IRL', 
-    'PT': 'PRT', 'GR': 'GRC',
-    'SE': 'SWE', 'NO': 'NOR', 'DK': 'DNK', 'FI': 'FIN', 'IS': 'ISL',
-    'PL': 'POL', 'CZ': 'CZE', 'HU': 'HUN', 'RO': 'ROU', 'BG': 'BGR', 
-    'SK': 'SVK', 'HR': 'HRV', 'SI': 'SVN', 'RS': 'SRB', 'LT': 'LTU', 
-    'LV': 'LVA', 'EE': 'EST', 'UA': 'UKR', 'BY': 'BLR',
-    'CN': 'CHN', 'JP': 'JPN', 'KR': 'KOR', 'TW': 'TWN', 'HK': 'HKG', 'MN': 'MNG',
-    'ID': 'IDN', 'TH': 'THA', 'VN': 'VNM', 'PH': 'PHL', 'MY': 'MYS', 
-    'SG': 'SGP', 'MM': 'MMR', 'KH': 'KHM', 'LA': 'LAO',
-    'IN': 'IND', 'PK': 'PAK', 'BD': 'BGD', 'LK': 'LKA', 'NP': 'NPL', 'AF': 'AFG',
-    'TR': 'TUR', 'SA': 'SAU', 'AE': 'ARE', 'IL': 'ISR', 'IR': 'IRN', 
-    'IQ': 'IRQ', 'EG': 'EGY', 'JO': 'JOR', 'LB': 'LBN', 'KW': 'KWT', 
-    'QA': 'QAT', 'OM': 'OMN', 'BH': 'BHR', 'YE': 'YEM',
-    'MA': 'MAR', 'DZ': 'DZA', 'TN': 'TUN', 'LY': 'LBY', 'NG': 'NGA', 
-    'GH': 'GHA', 'CI': 'CIV', 'SN': 'SEN', 'KE': 'KEN', 'ET': 'ETH', 
-    'TZ': 'TZA', 'UG': 'UGA', 'ZA': 'ZAF', 'ZW': 'ZWE', 'BW': 'BWA', 'NA': 'NAM',
-    'AU': 'AUS', 'NZ': 'NZL', 'FJ': 'FJI', 'PG': 'PNG',
-    'RU': 'RUS', 'KZ': 'KAZ', 'UZ': 'UZB', 'GE': 'GEO', 'AZ': 'AZE', 'AM': 'ARM'
-}
-
-REGION_MAP = {
-    'US': 'North America', 'CA': 'North America', 'MX': 'North America',
-    'BR': 'South America', 'AR': 'South America', 'CO': 'South America', 
-    'CL': 'South America', 'PE': 'South America', 'VE': 'South America', 
-    'EC': 'South America', 'UY': 'South America',
-    'GB': 'Western Europe', 'DE': 'Western Europe', 'FR': 'Western Europe', 
-    'IT': 'Western Europe', 'ES': 'Western Europe', 'NL': 'Western Europe', 
-    'BE': 'Western Europe', 'CH': 'Western Europe', 'AT': 'Western Europe', 
-    'IE': 'Western Europe', 'PT': 'Western Europe', 'GR': 'Western Europe',
-    'SE': 'Northern Europe', 'NO': 'Northern Europe', 'DK': 'Northern Europe', 
-    'FI': 'Northern Europe', 'IS': 'Northern Europe',
-    'PL': 'Eastern Europe', 'CZ': 'Eastern Europe', 'HU': 'Eastern Europe', 
-    'RO': 'Eastern Europe', 'BG': 'Eastern Europe', 'SK': 'Eastern Europe', 
-    'HR': 'Eastern Europe', 'SI': 'Eastern Europe', 'RS': 'Eastern Europe', 
-    'LT': 'Eastern Europe', 'LV': 'Eastern Europe', 'EE': 'Eastern Europe', 
-    'UA': 'Eastern Europe', 'BY': 'Eastern Europe',
-    'CN': 'East Asia', 'JP': 'East Asia', 'KR': 'East Asia', 
-    'TW': 'East Asia', 'HK': 'East Asia', 'MN': 'East Asia',
-    'ID': 'Southeast Asia', 'TH': 'Southeast Asia', 'VN': 'Southeast Asia', 
-    'PH': 'Southeast Asia', 'MY': 'Southeast Asia', 'SG': 'Southeast Asia', 
-    'MM': 'Southeast Asia', 'KH': 'Southeast Asia', 'LA': 'Southeast Asia',
-    'IN': 'South Asia', 'PK': 'South Asia', 'BD': 'South Asia', 
-    'LK': 'South Asia', 'NP': 'South Asia', 'AF': 'South Asia',
-    'TR': 'Middle East', 'SA': 'Middle East', 'AE': 'Middle East', 
-    'IL': 'Middle East', 'IR': 'Middle East', 'IQ': 'Middle East', 
-    'EG': 'Middle East', 'JO': 'Middle East', 'LB': 'Middle East', 
-    'KW': 'Middle East', 'QA': 'Middle East', 'OM': 'Middle East', 
-    'BH': 'Middle East', 'YE': 'Middle East',
-    'MA': 'North Africa', 'DZ': 'North Africa', 'TN': 'North Africa', 
-    'LY': 'North Africa',
-    'NG': 'West Africa', 'GH': 'West Africa', 'CI': 'West Africa', 'SN': 'West Africa',
-    'KE': 'East Africa', 'ET': 'East Africa', 'TZ': 'East Africa', 'UG': 'East Africa',
-    'ZA': 'Southern Africa', 'ZW': 'Southern Africa', 'BW': 'Southern Africa', 
-    'NA': 'Southern Africa',
-    'AU': 'Oceania', 'NZ': 'Oceania', 'FJ': 'Oceania', 'PG': 'Oceania',
-    'RU': 'Russia & Central Asia', 'KZ': 'Russia & Central Asia', 
-    'UZ': 'Russia & Central Asia', 'GE': 'Russia & Central Asia', 
-    'AZ': 'Russia & Central Asia', 'AM': 'Russia & Central Asia'
-}
-
-CONTINENT_MAP = {
-    'US': 'Americas', 'CA': 'Americas', 'MX': 'Americas',
-    'BR': 'Americas', 'AR': 'Americas', 'CO': 'Americas', 'CL': 'Americas', 
-    'PE': 'Americas', 'VE': 'Americas', 'EC': 'Americas', 'UY': 'Americas',
-    'GB': 'Europe', 'DE': 'Europe', 'FR': 'Europe', 'IT': 'Europe', 
-    'ES': 'Europe', 'NL': 'Europe', 'BE': 'Europe', 'CH': 'Europe', 
-    'AT': 'Europe', 'IE': 'Europe', 'PT': 'Europe', 'GR': 'Europe',
-    'SE': 'Europe', 'NO': 'Europe', 'DK': 'Europe', 'FI': 'Europe', 'IS': 'Europe',
-    'PL': 'Europe', 'CZ': 'Europe', 'HU': 'Europe', 'RO': 'Europe', 
-    'BG': 'Europe', 'SK': 'Europe', 'HR': 'Europe', 'SI': 'Europe', 
-    'RS': 'Europe', 'LT': 'Europe', 'LV': 'Europe', 'EE': 'Europe', 
-    'UA': 'Europe', 'BY': 'Europe', 'RU': 'Europe',
-    'CN': 'Asia', 'JP': 'Asia', 'KR': 'Asia', 'TW': 'Asia', 'HK': 'Asia', 'MN': 'Asia',
-    'ID': 'Asia', 'TH': 'Asia', 'VN': 'Asia', 'PH': 'Asia', 'MY': 'Asia', 
-    'SG': 'Asia', 'MM': 'Asia', 'KH': 'Asia', 'LA': 'Asia',
-    'IN': 'Asia', 'PK': 'Asia', 'BD': 'Asia', 'LK': 'Asia', 'NP': 'Asia', 'AF': 'Asia',
-    'TR': 'Asia', 'SA': 'Asia', 'AE': 'Asia', 'IL': 'Asia', 'IR': 'Asia', 
-    'IQ': 'Asia', 'EG': 'Africa', 'JO': 'Asia', 'LB': 'Asia', 'KW': 'Asia', 
-    'QA': 'Asia', 'OM': 'Asia', 'BH': 'Asia', 'YE': 'Asia',
-    'MA': 'Africa', 'DZ': 'Africa', 'TN': 'Africa', 'LY': 'Africa',
-    'NG': 'Africa', 'GH': 'Africa', 'CI': 'Africa', 'SN': 'Africa',
-    'KE': 'Africa', 'ET': 'Africa', 'TZ': 'Africa', 'UG': 'Africa',
-    'ZA': 'Africa', 'ZW': 'Africa', 'BW': 'Africa', 'NA': 'Africa',
-    'AU': 'Oceania', 'NZ': 'Oceania', 'FJ': 'Oceania', 'PG': 'Oceania',
-    'KZ': 'Asia', 'UZ': 'Asia', 'GE': 'Asia', 'AZ': 'Asia', 'AM': 'Asia'
-}
+from countries import REGISTRY
+from imputation import (INDICATOR_COLUMNS, GroupMedianSketch, apply_medians, group_medians,
+                        impute_knn)
+from memory_budget import MB, MemoryReport, downcast, enable_copy_on_write, frame_bytes
+from storage import (load_table, save_table, append_table, iter_table, apply_schema, TableWriter,
+                     CSV_NA)
+
+# Running aggregates of the last cleaning run, for --append
+STATE_PATH = Path("data/processed/.cleaning_state.json")
+
+# Columns the streaming mode needs for its first (statistics) pass
+STREAM_STAT_COLUMNS = ['country_code', 'avg_interest'] + INDICATOR_COLUMNS
 
 def load_data():
     
-    data_path = Path("data/processed/ai_adoption_combined.csv")
-    
-    if not data_path.exists():
+    try:
+        df = load_table('combined')
+    except FileNotFoundError:
         print("Error: Data file not found. Please run data_collection.py first.")
         return None
     
-    df = pd.read_csv(data_path)
     print(f"Loaded {len(df)} records")
     
-    df['country_code_iso3'] = df['country_code'].map(ISO_CODE_MAP)
-    df['region'] = df['country_code'].map(REGION_MAP)
-    df['continent'] = df['country_code'].map(CONTINENT_MAP)
+    df = REGISTRY.annotate(df)
     
     return df
 
-def clean_data(df):
-    
-    print("\nCleaning data...")
+def clean_data(df, medians=None, impute='grouped', verbose=True):
     
-    print("\nMissing values:")
-    print(df.isnull().sum())
+    if verbose:
+        print("\nCleaning data...")
+        print("\nMissing values:")
+        print(df.isnull().sum())
     
-    if 'gdp_per_capita' in df.columns:
-        median_gdp = df['gdp_per_capita'].median()
-        df['gdp_per_capita'].fillna(median_gdp, inplace=True)
-        print(f"\nGDP missing values filled with median: {median_gdp:.0f}")
+    # Indicators: region -> continent -> global median (or KNN), with the
+    # filled cells flagged in <column>_imputed
+    if impute == 'knn':
+        df, counts = impute_knn(df)
+    else:
+        df, counts = apply_medians(df, medians if medians is not None else group_medians(df))
+    if verbose:
+        print("\nImputed values by source:")
+        print(counts.to_string())
     
-    df = df[df['avg_interest'] > 0]
-    print(f"\nCleaning complete: {len(df)} records remaining")
+    # Filtering copies every column, so skip it when no row is dropped
+    keep = df['avg_interest'] > 0
+    if not keep.all():
+        df = df[keep]
+    if verbose:
+        print(f"\nCleaning complete: {len(df)} records remaining")
     
     return df
 
-def create_features(df):
+def create_features(df, max_interest=None, verbose=True):
     
-    print("\nCreating new features...")
+    if verbose:
+        print("\nCreating new features...")
     
     if 'gdp_per_capita' in df.columns:
         df['economic_category'] = pd.cut(
@@ -144,39 +76,210 @@ def create_features(df):
             bins=[0, 10000, 30000, float('inf')],
             labels=['Developing', 'Emerging', 'Developed']
         )
-        print("Economic category created")
+        if verbose:
+            print("Economic category created")
     
     if 'avg_interest' in df.columns and 'internet_users_pct' in df.columns:
-        df['ai_adoption_score'] = (
-            df['avg_interest'] / df['avg_interest'].max() * 0.7 +
-            df['internet_users_pct'] / 100 * 0.3
-        ) * 100
-        print("AI Adoption Score calculated")
+        if max_interest is None:
+            max_interest = df['avg_interest'].max()
+        df['ai_adoption_score'] = adoption_score(df, max_interest)
+        if verbose:
+            print("AI Adoption Score calculated")
     
     return df
 
+def adoption_score(df, max_interest):
+    
+    return (
+        df['avg_interest'] / max_interest * 0.7 +
+        df['internet_users_pct'] / 100 * 0.3
+    ) * 100
+
 def save_cleaned_data(df):
     
-    output_path = Path("data/processed/ai_adoption_cleaned.csv")
-    df.to_csv(output_path, index=False)
+    output_path = save_table(df, 'cleaned')
     print(f"\nCleaned data saved: {output_path}")
     return output_path
 
-def main():
+def scan_statistics(chunksize):
+    
+    # First pass: only the columns the cleaning statistics depend on, summarised
+    # in bounded memory (mergeable sketches for the group medians, a running max)
+    median_sketch = GroupMedianSketch()
+    max_interest = np.nan
+    rows = 0
+    
+    for chunk in iter_table('combined', chunksize, columns=STREAM_STAT_COLUMNS):
+        rows += len(chunk)
+        median_sketch.update(REGISTRY.annotate(chunk))
+        interest = chunk['avg_interest']
+        max_interest = np.fmax(max_interest, interest[interest > 0].max())
+    
+    return rows, median_sketch, max_interest
+
+def clean_streaming(chunksize, report, budget_bytes=None):
+    
+    print(f"\nStreaming cleaning in chunks of {chunksize:,} rows...")
+    
+    try:
+        rows, median_sketch, max_interest = scan_statistics(chunksize)
+    except FileNotFoundError:
+        print("Error: Data file not found. Please run data_collection.py first.")
+        return None
+    report.step('scan')
+    
+    medians = median_sketch.medians()
+    print(f"Scanned {rows:,} records")
+    if median_sketch.count('gdp_per_capita'):
+        print(f"GDP median (sketch of {median_sketch.count('gdp_per_capita'):,} values): "
+              f"{medians['global']['gdp_per_capita']:.0f}")
     
-    df = load_data()
-    if df is None:
-        return
+    # Second pass: clean and featurise each chunk with the global statistics
+    # and append it to the output, so memory stays bounded by the chunk size
+    chunk = None
+    max_interest = np.nan_to_num(max_interest)
+    with TableWriter('cleaned') as writer:
+        for chunk in iter_table('combined', chunksize):
+            chunk = REGISTRY.annotate(chunk)
+            if budget_bytes is not None:
+                chunk, _ = downcast(chunk, budget_bytes)
+            chunk = clean_data(chunk, medians=medians, verbose=False)
+            chunk = create_features(chunk, max_interest=max_interest, verbose=False)
+            writer.write(chunk)
+    report.step('clean+write (last chunk)', chunk)
+    save_feature_state(median_sketch, max_interest, writer.rows)
     
-    df = clean_data(df)
-    df = create_features(df)
-    save_cleaned_data(df)
+    print(f"\nCleaning complete: {writer.rows:,} records remaining")
+    print(f"Cleaned data saved: {writer.path}")
+    return writer.rows
+
+def save_feature_state(median_sketch, max_interest, rows):
+    
+    state = {'rows': int(rows), 'max_interest': float(max_interest),
+             'medians': median_sketch.to_dict()}
+    tmp = STATE_PATH.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, STATE_PATH)
+
+def load_feature_state():
+    
+    if not STATE_PATH.exists():
+        return None
+    with open(STATE_PATH) as f:
+        state = json.load(f)
+    state['medians'] = GroupMedianSketch.from_dict(state['medians'])
+    return state
+
+def append_data(new_path):
+    
+    print(f"\nAppending {new_path}...")
+    
+    state = load_feature_state()
+    if state is None:
+        print("Error: No cleaning state found. Run a full cleaning first.")
+        return None
+    
+    raw = apply_schema(pd.read_csv(new_path, **CSV_NA))
+    new = REGISTRY.annotate(raw.copy())
+    
+    # Rows replacing existing countries can lower the max or move medians,
+    # so they go through a full rebuild instead
+    existing = load_table('cleaned', columns=['country_code'])['country_code']
+    if new['country_code'].isin(existing).any():
+        print("New rows replace existing countries: rebuilding the full table")
+        combined = load_table('combined')
+        combined = combined[~combined['country_code'].isin(raw['country_code'])]
+        save_table(pd.concat([combined, raw], ignore_index=True), 'combined')
+        return main()
+    
+    append_table(raw, 'combined')
+    
+    # Running aggregates: sketch medians absorb the new values, and the max
+    # only moves if a new row exceeds it. Cells imputed in earlier runs keep
+    # their values until the next full cleaning
+    median_sketch = state['medians'].update(new)
+    interest = new['avg_interest']
+    max_interest = max(state['max_interest'], np.nan_to_num(interest[interest > 0].max()))
+    
+    new = clean_data(new, medians=median_sketch.medians(), verbose=False)
+    new = create_features(new, max_interest=max_interest, verbose=False)
+    
+    if max_interest > state['max_interest']:
+        print(f"Max interest rose {state['max_interest']:.2f} -> {max_interest:.2f}: "
+              f"rescaling ai_adoption_score")
+        cleaned = load_table('cleaned')
+        cleaned['ai_adoption_score'] = adoption_score(cleaned, max_interest)
+        save_table(pd.concat([cleaned, new], ignore_index=True), 'cleaned')
+    else:
+        append_table(new, 'cleaned')
+    
+    rows = state['rows'] + len(new)
+    save_feature_state(median_sketch, max_interest, rows)
+    print(f"Appended {len(new)} records ({len(raw) - len(new)} filtered), {rows} in total")
+    return new
+
+def main(df=None, chunksize=None, memory_budget_mb=None, impute='grouped'):
+    
+    enable_copy_on_write()
+    budget_bytes = memory_budget_mb * MB if memory_budget_mb else None
+    
+    with MemoryReport(budget_bytes, enabled=budget_bytes is not None) as report:
+        if chunksize:
+            rows = clean_streaming(chunksize, report, budget_bytes)
+            if budget_bytes is not None:
+                report.print_report()
+            return rows
+        
+        if df is None:
+            df = load_data()
+        else:
+            df = REGISTRY.annotate(df)
+        if df is None:
+            return
+        report.step('load', df)
+        median_sketch = GroupMedianSketch().update(df)
+        
+        if budget_bytes is not None:
+            before = frame_bytes(df)
+            df, applied = downcast(df, budget_bytes)
+            print(f"\nDowncast ({', '.join(applied) or 'not needed'}): "
+                  f"{before / MB:.1f} MB -> {frame_bytes(df) / MB:.1f} MB")
+            report.step('downcast', df)
+        
+        df = clean_data(df, impute=impute)
+        report.step('clean', df)
+        df = create_features(df)
+        report.step('features', df)
+        save_cleaned_data(df)
+        save_feature_state(median_sketch, df['avg_interest'].max(), len(df))
+        report.step('save', df)
+    
+    if budget_bytes is not None:
+        report.print_report()
     
     print("\n" + "="*60)
     print("DATA CLEANING COMPLETE")
     print("="*60)
     print(f"\nFinal dataset: {len(df)} countries, {len(df.columns)} columns")
     print("\nColumns:", list(df.columns))
+    
+    return df
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Clean and prepare collected data for analysis.")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream the input in chunks of this many rows (constant memory)')
+    parser.add_argument('--memory-budget', type=float, default=None, metavar='MB',
+                        help='downcast dtypes to fit this budget and report memory per step')
+    parser.add_argument('--impute', choices=['grouped', 'knn'], default='grouped',
+                        help='fill indicators by region/continent/global median or by nearest neighbours')
+    parser.add_argument('--append', metavar='CSV',
+                        help='clean only these new rows and add them to the existing cleaned table')
+    args = parser.parse_args()
+    if args.append:
+        append_data(args.append)
+    elif args.chunksize and args.impute == 'knn':
+        parser.error('--impute knn needs the whole table and cannot be combined with --chunksize')
+    else:
+        main(chunksize=args.chunksize, memory_budget_mb=args.memory_budget, impute=args.impute)
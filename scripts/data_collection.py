@@ -10,18 +10,44 @@ Date: January 2026
 import pandas as pd
 import numpy as np
 from pytrends.request import TrendReq
+from pytrends.exceptions import TooManyRequestsError
 import requests
 import time
 from pathlib import Path
 import json
+import io
+import sys
+import threading
 from datetime import datetime, timedelta
 
+from countries import REGISTRY
+from world_bank_client import WorldBankClient, WORLD_BANK_INDICATORS, make_session, country_indicators
+from http_cache import ResponseCache, CachedSession
+from rate_limit import AdaptiveTokenBucket
+from journal import CollectionJournal
+from github_client import GitHubClient, GitHubRequestError
+from scheduler import JobScheduler, SourceBudget
+from storage import save_table
+from trends_features import series_matrix, save_weekly, feature_frame, weekly_name, tool_slug
+
+# Google Trends compares at most five terms per payload
+TRENDS_MAX_KEYWORDS = 5
+
 class AIAdoptionCollector:
     
-    def __init__(self):
-        self.pytrends = TrendReq(hl='en-US', tz=360)
+    def __init__(self, offline=False):
+        self._trends_local = threading.local()
         self.data_dir = Path("data/raw")
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.journal_dir = self.data_dir / "journal"
+        
+        self.cache = ResponseCache(self.data_dir / "cache", offline=offline)
+        self.world_bank = WorldBankClient(
+            session=CachedSession(self.cache, make_session(), source='worldbank')
+        )
+        self.github = GitHubClient(session=CachedSession(self.cache, source='github'))
+        # Starts at the old one-request-per-2s pace and adapts from there
+        self.trends_limiter = AdaptiveTokenBucket(rate=0.5, min_rate=0.05, max_rate=2.0)
         
         self.ai_tools = [
             'ChatGPT',
@@ -31,94 +57,211 @@ class AIAdoptionCollector:
             'Stable Diffusion'
         ]
         
-        self.countries = {
-            'US': 'United States', 'CA': 'Canada', 'MX': 'Mexico',
-            'BR': 'Brazil', 'AR': 'Argentina', 'CO': 'Colombia', 'CL': 'Chile',
-            'PE': 'Peru', 'VE': 'Venezuela', 'EC': 'Ecuador', 'UY': 'Uruguay',
-            'GB': 'United Kingdom', 'DE': 'Germany', 'FR': 'France', 'IT': 'Italy',
-            'ES': 'Spain', 'NL': 'Netherlands', 'BE': 'Belgium', 'CH': 'Switzerland',
-            'AT': 'Austria', 'IE': 'Ireland', 'PT': 'Portugal', 'GR': 'Greece',
-            'SE': 'Sweden', 'NO': 'Norway', 'DK': 'Denmark', 'FI': 'Finland',
-            'IS': 'Iceland',
-            'PL': 'Poland', 'CZ': 'Czech Republic', 'HU': 'Hungary', 'RO': 'Romania',
-            'BG': 'Bulgaria', 'SK': 'Slovakia', 'HR': 'Croatia', 'SI': 'Slovenia',
-            'RS': 'Serbia', 'LT': 'Lithuania', 'LV': 'Latvia', 'EE': 'Estonia',
-            'UA': 'Ukraine', 'BY': 'Belarus',
-            'CN': 'China', 'JP': 'Japan', 'KR': 'South Korea', 'TW': 'Taiwan',
-            'HK': 'Hong Kong', 'MN': 'Mongolia',
-            'ID': 'Indonesia', 'TH': 'Thailand', 'VN': 'Vietnam', 'PH': 'Philippines',
-            'MY': 'Malaysia', 'SG': 'Singapore', 'MM': 'Myanmar', 'KH': 'Cambodia',
-            'LA': 'Laos',
-            'IN': 'India', 'PK': 'Pakistan', 'BD': 'Bangladesh', 'LK': 'Sri Lanka',
-            'NP': 'Nepal', 'AF': 'Afghanistan',
-            'TR': 'Turkey', 'SA': 'Saudi Arabia', 'AE': 'United Arab Emirates',
-            'IL': 'Israel', 'IR': 'Iran', 'IQ': 'Iraq', 'EG': 'Egypt', 
-            'JO': 'Jordan', 'LB': 'Lebanon', 'KW': 'Kuwait', 'QA': 'Qatar',
-            'OM': 'Oman', 'BH': 'Bahrain', 'YE': 'Yemen',
-            'MA': 'Morocco', 'DZ': 'Algeria', 'TN': 'Tunisia', 'LY': 'Libya',
-            'NG': 'Nigeria', 'GH': 'Ghana', 'CI': 'Ivory Coast', 'SN': 'Senegal',
-            'KE': 'Kenya', 'ET': 'Ethiopia', 'TZ': 'Tanzania', 'UG': 'Uganda',
-            'ZA': 'South Africa', 'ZW': 'Zimbabwe', 'BW': 'Botswana', 'NA': 'Namibia',
-            'AU': 'Australia', 'NZ': 'New Zealand', 'FJ': 'Fiji', 'PG': 'Papua New Guinea',
-            'RU': 'Russia', 'KZ': 'Kazakhstan', 'UZ': 'Uzbekistan', 'GE': 'Georgia',
-            'AZ': 'Azerbaijan', 'AM': 'Armenia'
-        }
-        
-    def collect_google_trends(self, tool_name, timeframe='2023-01-01 2025-12-31'):
-        
-        print(f"\nCollecting Google Trends data for {tool_name}...")
+        self.countries = REGISTRY.name_map()
+    
+    @property
+    def pytrends(self):
+        # TrendReq keeps per-payload state and fetches a Google cookie on
+        # creation, so each worker thread builds its own on first cache miss
+        client = getattr(self._trends_local, 'client', None)
+        if client is None:
+            client = self._trends_local.client = TrendReq(hl='en-US', tz=360)
+        return client
+    
+    def _trends_request(self, fetch):
+        return self.trends_limiter.call(
+            fetch, is_throttle=lambda e: isinstance(e, TooManyRequestsError)
+        )
+    
+    def _interest_over_time(self, keywords, timeframe, geo):
+        
+        def fetch():
+            self.pytrends.build_payload(
+                keywords,
+                cat=0,
+                timeframe=timeframe,
+                geo=geo,
+                gprop=''
+            )
+            return self.pytrends.interest_over_time()
+        
+        return self.cache.get_or_compute(
+            ('interest_over_time', keywords, timeframe, geo), 'trends',
+            lambda: self._trends_request(fetch),
+            dumps=lambda frame: frame.to_csv().encode(),
+            loads=lambda body: (pd.read_csv(io.BytesIO(body), index_col=0, parse_dates=True)
+                                if body.strip() else pd.DataFrame())
+        )
+    
+    def _interest_by_region(self, keywords, timeframe):
+        
+        def fetch():
+            # build_payload keeps the previous geo when given '', reset it
+            self.pytrends.geo = ''
+            self.pytrends.build_payload(
+                keywords,
+                cat=0,
+                timeframe=timeframe,
+                geo='',
+                gprop=''
+            )
+            return self.pytrends.interest_by_region(
+                resolution='COUNTRY', inc_low_vol=True, inc_geo_code=True
+            )
+        
+        return self.cache.get_or_compute(
+            ('interest_by_region', keywords, timeframe), 'trends',
+            lambda: self._trends_request(fetch),
+            dumps=lambda frame: frame.to_csv().encode(),
+            loads=lambda body: pd.read_csv(io.BytesIO(body), index_col=0, keep_default_na=False)
+        )
+    
+    def _weekly_record(self, interest_over_time, keywords):
         
-        all_data = []
+        weeks = interest_over_time.index.strftime('%Y-%m-%d').tolist()
+        return {tool_name: dict(zip(weeks, interest_over_time[tool_name].tolist()))
+                for tool_name in keywords}
+    
+    def _trend_frame(self, records, keywords, tool_name):
         
-        for country_code, country_name in self.countries.items():
-            try:
-                self.pytrends.build_payload(
-                    [tool_name],
-                    cat=0,
-                    timeframe=timeframe,
-                    geo=country_code,
-                    gprop=''
-                )
-                
-                interest_over_time = self.pytrends.interest_over_time()
-                
-                if not interest_over_time.empty:
-                    avg_interest = interest_over_time[tool_name].mean()
-                    max_interest = interest_over_time[tool_name].max()
-                    last_interest = interest_over_time[tool_name].iloc[-1]
+        # records: country_code -> {tool: {week: value}} (None = no data)
+        series_by_country = {code: record[tool_name] for code, record in records.items() if record}
+        matrix, weeks = series_matrix(series_by_country, list(self.countries))
+        save_weekly(weekly_name(keywords, tool_name), matrix, list(self.countries), weeks)
+        return feature_frame(matrix, list(self.countries), weeks, self.countries, tool_name)
+    
+    def collect_google_trends(self, tool_name, timeframe='2023-01-01 2025-12-31'):
+        return self.collect_google_trends_batch([tool_name], timeframe)[tool_name]
+    
+    def collect_google_trends_batch(self, tools=None, timeframe='2023-01-01 2025-12-31'):
+        
+        tools = list(tools or self.ai_tools)
+        print(f"\nCollecting Google Trends data for {', '.join(tools)}...")
+        
+        frames = {}
+        
+        # Up to five terms share one payload. Google scales a payload jointly
+        # (its busiest term peaks at 100), so multi-tool values are comparable
+        # across tools but not to single-keyword pulls.
+        for start in range(0, len(tools), TRENDS_MAX_KEYWORDS):
+            keywords = tools[start:start + TRENDS_MAX_KEYWORDS]
+            slugs = [tool_slug(tool) for tool in keywords]
+            journal = CollectionJournal(self.journal_dir / f"trends_{'+'.join(slugs)}.jsonl")
+            if journal.resumed:
+                print(f"  Resuming: {journal.resumed} countries already collected")
+            
+            for country_code, country_name in self.countries.items():
+                if country_code in journal:
+                    continue
+                try:
+                    interest_over_time, _ = self._interest_over_time(
+                        keywords, timeframe, country_code
+                    )
                     
-                    first_half = interest_over_time[tool_name].iloc[:len(interest_over_time)//2].mean()
-                    second_half = interest_over_time[tool_name].iloc[len(interest_over_time)//2:].mean()
-                    trend_direction = 'rising' if second_half > first_half else 'falling'
-                    trend_magnitude = abs(second_half - first_half) / (first_half + 1) * 100
+                    if interest_over_time.empty:
+                        journal.append(country_code, None)
+                        print(f"  {country_name}: No data available")
+                        continue
                     
-                    all_data.append({
-                        'country_code': country_code,
-                        'country_name': country_name,
-                        'tool': tool_name,
-                        'avg_interest': round(avg_interest, 2),
-                        'max_interest': max_interest,
-                        'current_interest': last_interest,
-                        'trend_direction': trend_direction,
-                        'trend_magnitude': round(trend_magnitude, 2),
-                        'data_points': len(interest_over_time)
-                    })
+                    journal.append(country_code, self._weekly_record(interest_over_time, keywords))
+                    print(f"  {country_name}: {len(interest_over_time)} weeks")
                     
-                    print(f"  {country_name}: Avg={avg_interest:.1f}, Max={max_interest}")
-                else:
-                    print(f"  {country_name}: No data available")
-                
-                time.sleep(2)
-                
-            except Exception as e:
-                print(f"  {country_name}: Error - {str(e)}")
-                continue
+                except Exception as e:
+                    print(f"  {country_name}: Error - {str(e)}")
+                    continue
+            
+            tables = {}
+            for tool_name, slug in zip(keywords, slugs):
+                frames[tool_name] = self._trend_frame(journal.records, keywords, tool_name)
+                tables[self.data_dir / f"trends_{slug}.csv"] = frames[tool_name]
+            
+            journal.compact(tables, keep=len(journal) < len(self.countries))
+            for output_file, df in tables.items():
+                print(f"\nSaved {len(df)} records to {output_file}")
         
-        df = pd.DataFrame(all_data)
+        limiter = self.trends_limiter
+        print(f"Trends requests: {limiter.successes} ok, {limiter.throttles} throttled "
+              f"(rate now {limiter.rate:.2f}/s)")
+        
+        return frames
+    
+    def collect_trends_by_region(self, tools=None, timeframe='2023-01-01 2025-12-31'):
         
-        output_file = self.data_dir / f"trends_{tool_name.lower().replace(' ', '_')}.csv"
+        tools = list(tools or self.ai_tools)
+        print(f"\nCollecting Google Trends interest by country for {', '.join(tools)}...")
+        
+        frames = []
+        
+        # One call per five terms covers every country at once. It returns a
+        # single figure per country, scaled across countries (the top one is
+        # 100), so it cannot stand in for the per-country weekly series that
+        # avg/max/current interest, the trend and the stored .npy come from
+        for start in range(0, len(tools), TRENDS_MAX_KEYWORDS):
+            keywords = tools[start:start + TRENDS_MAX_KEYWORDS]
+            by_region, _ = self._interest_by_region(keywords, timeframe)
+            
+            by_region = by_region[by_region['geoCode'].isin(self.countries.keys())]
+            long_df = by_region.melt(id_vars='geoCode', value_vars=keywords,
+                                     var_name='tool', value_name='region_interest')
+            frames.append(long_df.rename(columns={'geoCode': 'country_code'}))
+        
+        df = pd.concat(frames, ignore_index=True)
+        df.insert(1, 'country_name', df['country_code'].map(self.countries))
+        
+        output_file = self.data_dir / "trends_by_region.csv"
         df.to_csv(output_file, index=False)
-        print(f"\nSaved {len(df)} records to {output_file}")
+        print(f"Saved {len(df)} records for {df['country_code'].nunique()} countries to {output_file}")
+        
+        return df
+    
+    def source_budgets(self):
+        return {
+            'trends': SourceBudget(concurrency=2, limiter=self.trends_limiter),
+            'worldbank': SourceBudget(concurrency=1)
+        }
+    
+    def collect_trends_all_tools(self, tools=None, timeframe='2023-01-01 2025-12-31',
+                                 scheduler=None):
+        
+        # Adds one job per (tool, country) to the scheduler and runs it,
+        # together with any jobs from other sources already queued there
+        
+        tools = list(tools or self.ai_tools)
+        print(f"\nCollecting Google Trends data for {len(tools)} tools x {len(self.countries)} countries...")
+        
+        journal = CollectionJournal(self.journal_dir / "trends_all_tools.jsonl")
+        if journal.resumed:
+            print(f"  Resuming: {journal.resumed} tool/country units already collected")
+        
+        def trends_job(tool_name, country_code):
+            # One keyword per payload keeps every tool on its own 0-100
+            # scale, so ChatGPT values match the single-tool collection
+            interest_over_time, _ = self._interest_over_time([tool_name], timeframe, country_code)
+            record = None
+            if not interest_over_time.empty:
+                record = self._weekly_record(interest_over_time, [tool_name])
+            journal.append(f"{tool_name}|{country_code}", record)
+            return record
+        
+        scheduler = scheduler or JobScheduler(self.source_budgets())
+        for tool_name in tools:
+            for country_code in self.countries:
+                if f"{tool_name}|{country_code}" not in journal:
+                    scheduler.add((tool_name, country_code, 'trends'),
+                                  lambda t=tool_name, c=country_code: trends_job(t, c))
+        scheduler.run()
+        
+        df = pd.concat([
+            self._trend_frame(
+                {code: journal.get(f"{tool_name}|{code}") for code in self.countries},
+                [tool_name], tool_name
+            )
+            for tool_name in tools
+        ], ignore_index=True)
+        
+        output_file = self.data_dir / "trends_all_tools.csv"
+        journal.compact({output_file: df}, keep=len(journal) < len(tools) * len(self.countries))
+        print(f"\nSaved {len(df)} tool/country records to {output_file}")
         
         return df
     
@@ -126,100 +269,76 @@ class AIAdoptionCollector:
         
         print("\nCollecting World Bank data...")
         
-        indicators = {
-            'NY.GDP.PCAP.CD': 'gdp_per_capita',
-            'SE.TER.ENRR': 'tertiary_education',
-            'IT.NET.USER.ZS': 'internet_users_pct',
-            'SP.POP.TOTL': 'population'
-        }
+        journal = CollectionJournal(self.journal_dir / "world_bank.jsonl")
+        if journal.resumed:
+            print(f"  Resuming: {journal.resumed} countries already collected")
         
-        all_data = []
+        def on_batch(batch, values):
+            for country_code in batch:
+                country_data = country_indicators(country_code, WORLD_BANK_INDICATORS, values)
+                journal.append(country_code, country_data or None)
+                if country_data:
+                    print(f"  {country_code}: {len(country_data)} indicators collected")
         
-        for country_code in self.countries.keys():
-            country_data = {'country_code': country_code}
-            
-            for indicator_code, indicator_name in indicators.items():
-                try:
-                    url = f"https://api.worldbank.org/v2/country/{country_code}/indicator/{indicator_code}"
-                    params = {
-                        'format': 'json',
-                        'date': '2022:2024',
-                        'per_page': 100
-                    }
-                    
-                    response = requests.get(url, params=params, timeout=10)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if len(data) > 1 and data[1]:
-                            values = [item['value'] for item in data[1] if item['value'] is not None]
-                            if values:
-                                country_data[indicator_name] = values[0]
-                    
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"  {country_code} - {indicator_name}: {str(e)}")
-                    continue
-            
-            if len(country_data) > 1:
-                all_data.append(country_data)
-                print(f"  {country_code}: {len(country_data)-1} indicators collected")
+        pending = [code for code in self.countries if code not in journal]
+        self.world_bank.fetch(pending, WORLD_BANK_INDICATORS, date='2022:2024', on_batch=on_batch)
+        print(f"  ({self.world_bank.request_count} API requests)")
         
-        df = pd.DataFrame(all_data)
+        df = pd.DataFrame([
+            {'country_code': code, **journal.get(code)}
+            for code in self.countries if journal.get(code)
+        ])
         
         output_file = self.data_dir / "world_bank_indicators.csv"
-        df.to_csv(output_file, index=False)
+        journal.compact({output_file: df}, keep=len(journal) < len(self.countries))
         print(f"\nSaved data for {len(df)} countries to {output_file}")
         
         return df
     
-    def collect_github_data(self):
+    def collect_github_data(self, max_pages=1):
         
         print("\nCollecting GitHub data...")
         
-        base_url = "https://api.github.com/search/repositories"
-        
-        all_data = []
+        journal = CollectionJournal(self.journal_dir / "github.jsonl")
+        if journal.resumed:
+            print(f"  Resuming: {journal.resumed} countries already collected")
         
         for country_code, country_name in self.countries.items():
+            if country_code in journal:
+                continue
             try:
                 query = f"topic:artificial-intelligence OR topic:machine-learning location:{country_name}"
-                params = {
-                    'q': query,
-                    'sort': 'stars',
-                    'order': 'desc',
-                    'per_page': 100
-                }
+                total_count, items = self.github.search_repositories(query, max_pages=max_pages)
                 
-                response = requests.get(base_url, params=params, timeout=10)
+                journal.append(country_code, {
+                    'country_code': country_code,
+                    'country_name': country_name,
+                    'ai_repos_count': total_count,
+                    'top_repo_stars': items[0]['stargazers_count'] if items else 0,
+                    'top_repos_stars_total': sum(item['stargazers_count'] for item in items),
+                    'top_repos_sampled': len(items)
+                })
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    all_data.append({
-                        'country_code': country_code,
-                        'country_name': country_name,
-                        'ai_repos_count': data.get('total_count', 0),
-                        'top_repo_stars': data['items'][0]['stargazers_count'] if data['items'] else 0
-                    })
-                    
-                    print(f"  {country_name}: {data.get('total_count', 0)} repos")
-                elif response.status_code == 403:
-                    print(f"  Rate limit reached, waiting...")
-                    time.sleep(60)
-                    continue
+                print(f"  {country_name}: {total_count} repos")
                 
-                time.sleep(2)
+            except GitHubRequestError as e:
+                # Permanent (4xx) failure: journaled as terminal so later
+                # runs do not repeat it
+                journal.append(country_code, None)
+                print(f"  {country_name}: {str(e)}")
                 
             except Exception as e:
+                # Left out of the journal, so the next run retries it
                 print(f"  {country_name}: {str(e)}")
                 continue
         
-        df = pd.DataFrame(all_data)
+        print(f"  ({self.github.request_count} API requests, {self.github.retry_count} retries, "
+              f"{'authenticated' if self.github.token else 'unauthenticated'})")
+        
+        df = pd.DataFrame([journal.get(code) for code in self.countries if journal.get(code)])
         
         output_file = self.data_dir / "github_ai_activity.csv"
-        df.to_csv(output_file, index=False)
+        journal.compact({output_file: df}, keep=len(journal) < len(self.countries))
         print(f"\nSaved data for {len(df)} countries to {output_file}")
         
         return df
@@ -232,13 +351,22 @@ class AIAdoptionCollector:
         
         start_time = time.time()
         
-        print("\nStep 1/2: Google Trends Data")
+        print("\nGoogle Trends (all tools) + World Bank Economic Data")
         print("-"*60)
-        chatgpt_trends = self.collect_google_trends('ChatGPT')
         
-        print("\nStep 2/2: World Bank Economic Data")
-        print("-"*60)
-        wb_data = self.collect_world_bank_data()
+        # World Bank runs as a single job (the client batches and pools its
+        # own requests) alongside the Trends work graph. So does the
+        # all-countries interest_by_region pull: one payload per five tools
+        # gives every country's interest on a scale comparable across
+        # countries. The per-country jobs remain for the weekly series it
+        # cannot return
+        scheduler = JobScheduler(self.source_budgets())
+        scheduler.add((None, 'ALL', 'worldbank'), self.collect_world_bank_data)
+        scheduler.add((None, 'ALL', 'trends'), self.collect_trends_by_region)
+        trends_all = self.collect_trends_all_tools(scheduler=scheduler)
+        wb_data = scheduler.results.get((None, 'ALL', 'worldbank'), pd.DataFrame())
+        by_region = scheduler.results.get((None, 'ALL', 'trends'), pd.DataFrame())
+        chatgpt_trends = trends_all[trends_all['tool'] == 'ChatGPT']
         
         print("\nSkipping GitHub API (location data unreliable)")
         
@@ -247,12 +375,21 @@ class AIAdoptionCollector:
         combined = chatgpt_trends[['country_code', 'country_name', 'avg_interest', 
                                    'max_interest', 'current_interest', 'trend_direction']]
         
+        tool_interest = trends_all.pivot(index='country_code', columns='tool', values='avg_interest')
+        tool_interest.columns = [f"interest_{tool.lower().replace(' ', '_').replace('-', '_')}"
+                                 for tool in tool_interest.columns]
+        combined = combined.merge(tool_interest.reset_index(), on='country_code', how='left')
+        
+        if not by_region.empty:
+            region_interest = by_region.pivot(index='country_code', columns='tool', values='region_interest')
+            region_interest.columns = [f"region_interest_{tool.lower().replace(' ', '_').replace('-', '_')}"
+                                       for tool in region_interest.columns]
+            combined = combined.merge(region_interest.reset_index(), on='country_code', how='left')
+        
         if not wb_data.empty:
             combined = combined.merge(wb_data, on='country_code', how='left')
         
-        output_file = Path("data/processed/ai_adoption_combined.csv")
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        combined.to_csv(output_file, index=False)
+        output_file = save_table(combined, 'combined')
         
         elapsed = time.time() - start_time
         print("\n" + "="*60)
@@ -261,6 +398,7 @@ class AIAdoptionCollector:
         print(f"Total countries: {len(combined)}")
         print(f"Total columns: {len(combined.columns)}")
         print(f"Time elapsed: {elapsed/60:.1f} minutes")
+        print(f"Cache: {self.cache.hits} hits, {self.cache.misses} misses")
         print(f"Output file: {output_file}")
         print("="*60)
         
@@ -272,7 +410,8 @@ class AIAdoptionCollector:
 
 def main():
     
-    collector = AIAdoptionCollector()
+    # --offline serves everything from data/raw/cache and never hits the APIs
+    collector = AIAdoptionCollector(offline='--offline' in sys.argv[1:])
     df = collector.collect_all_data()
     
     print("\nTop Countries by ChatGPT Interest:")
@@ -0,0 +1,177 @@
+"""
+GitHub Client - AI Adoption Project
+
+Rate-limit-aware GitHub search client. Paces requests from the
+X-RateLimit-Remaining/X-RateLimit-Reset headers, waits out primary and
+secondary limits instead of dropping work, follows Link pagination, and
+uses GITHUB_TOKEN (if set) for the higher authenticated quota. Server
+errors (5xx), 403 and 429 are retried; any other 4xx is permanent and is
+raised as GitHubRequestError so callers can record it instead of
+retrying it on every run.
+"""
+
+import os
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+class GitHubRateLimitError(RuntimeError):
+    pass
+
+
+class GitHubRequestError(RuntimeError):
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_retry_after(value, now=None):
+
+    # Retry-After is either delay-seconds or an HTTP-date (RFC 9110)
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - (time.time() if now is None else now), 0)
+
+
+class GitHubClient:
+
+    def __init__(self, session=None, token=None, base_url=GITHUB_API_URL, max_retries=5,
+                 timeout=10):
+        self.session = session or requests.Session()
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.token = token or os.environ.get('GITHUB_TOKEN')
+
+        self.headers = {
+            'Accept': 'application/vnd.github+json',
+            'X-GitHub-Api-Version': '2022-11-28'
+        }
+        if self.token:
+            self.headers['Authorization'] = f"Bearer {self.token}"
+
+        self.remaining = None
+        self.reset_at = None
+        self.next_request_at = 0.0
+        self.request_count = 0
+        self.retry_count = 0
+
+    def _update_quota(self, response):
+
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset_at = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset_at is None:
+            return
+        self.remaining = int(remaining)
+        self.reset_at = float(reset_at)
+
+        # Spread the remaining quota evenly over what is left of the window
+        now = time.time()
+        window = max(self.reset_at - now, 0)
+        if self.remaining > 0:
+            self.next_request_at = now + window / (self.remaining + 1)
+        else:
+            self.next_request_at = now + window + 1
+
+    def _pace(self):
+        delay = self.next_request_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _retry_delay(self, response, attempt):
+
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None:
+                delay = parse_retry_after(retry_after)
+                if delay is not None:
+                    return delay
+            if self.remaining == 0 and self.reset_at is not None:
+                return max(self.reset_at - time.time(), 0) + 1
+        # Secondary limits without a hint: back off exponentially from a
+        # minute. Connection and server errors start from a second
+        if response is not None and response.status_code in (403, 429):
+            return 60 * 2 ** attempt
+        return 2 ** attempt
+
+    def get(self, path_or_url, params=None):
+
+        url = path_or_url if path_or_url.startswith('http') else f"{self.base_url}{path_or_url}"
+
+        for attempt in range(self.max_retries + 1):
+            self._pace()
+            try:
+                response = self.session.get(url, params=params, headers=self.headers,
+                                            timeout=self.timeout)
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    raise
+                self.retry_count += 1
+                time.sleep(self._retry_delay(None, attempt))
+                continue
+
+            # Count network round trips: live responses and 304
+            # revalidations, which also spend quota. Cached bodies are
+            # stored without quota headers, so only those responses update it
+            if not getattr(response, 'from_cache', False) or getattr(response, 'revalidated', False):
+                self.request_count += 1
+            self._update_quota(response)
+
+            if response.status_code in (403, 429) and (
+                    self.remaining == 0 or 'Retry-After' in response.headers
+                    or 'rate limit' in response.text.lower()):
+                if attempt == self.max_retries:
+                    raise GitHubRateLimitError(f"Rate limited after {attempt + 1} attempts: {url}")
+                delay = self._retry_delay(response, attempt)
+                print(f"  Rate limit reached, retrying in {delay:.0f}s...")
+                self.retry_count += 1
+                time.sleep(delay)
+                continue
+
+            if response.status_code >= 500:
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+                self.retry_count += 1
+                time.sleep(self._retry_delay(response, attempt))
+                continue
+
+            if response.status_code in (403, 429):
+                # Forbidden without any rate-limit signal: still retried,
+                # as GitHub's secondary limits do not always announce themselves
+                if attempt == self.max_retries:
+                    raise GitHubRateLimitError(f"Still forbidden after {attempt + 1} attempts: {url}")
+                self.retry_count += 1
+                time.sleep(self._retry_delay(response, attempt))
+                continue
+
+            if response.status_code >= 400:
+                raise GitHubRequestError(f"{response.status_code} {response.reason}: {url}",
+                                         response.status_code)
+            return response
+
+    def search_repositories(self, query, sort='stars', order='desc', per_page=100, max_pages=1):
+
+        params = {'q': query, 'sort': sort, 'order': order, 'per_page': per_page}
+        response = self.get('/search/repositories', params=params)
+        data = response.json()
+        total_count = data.get('total_count', 0)
+        items = list(data.get('items', []))
+
+        pages = 1
+        while pages < max_pages and 'next' in response.links:
+            response = self.get(response.links['next']['url'])
+            items.extend(response.json().get('items', []))
+            pages += 1
+
+        return total_count, items
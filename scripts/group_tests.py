@@ -0,0 +1,130 @@
+"""
+Group Tests - AI Adoption Project
+
+Differences in avg_interest between groups of countries, for several
+grouping columns at once. The value column is ranked once. Then one
+groupby per grouping column gathers each group's sufficient statistics:
+count, mean, variance and rank sum. ANOVA, Welch's ANOVA and
+Kruskal-Wallis, plus Tukey HSD and Games-Howell post-hoc comparisons, are
+all computed from those small tables. The cost is linear in the number of
+rows whatever the number of groups.
+"""
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+GROUP_COLUMNS = ['region', 'continent', 'economic_category', 'cluster_name']
+
+
+def group_statistics(df, value, by):
+
+    frame = df[[by, value, '_rank']].dropna()
+    summary = frame.groupby(by, observed=True).agg(
+        n=(value, 'count'), mean=(value, 'mean'), var=(value, 'var'), rank_sum=('_rank', 'sum'))
+    return summary
+
+
+def omnibus(summary, tie_correction):
+
+    n, mean, var = summary['n'].to_numpy(float), summary['mean'].to_numpy(), summary['var'].to_numpy()
+    k, N = len(n), n.sum()
+    grand_mean = (n * mean).sum() / N
+
+    # One-way ANOVA
+    ss_between = (n * (mean - grand_mean) ** 2).sum()
+    ss_within = ((n - 1) * var).sum()
+    f_stat = (ss_between / (k - 1)) / (ss_within / (N - k))
+    f_p = stats.f.sf(f_stat, k - 1, N - k)
+
+    # Welch's ANOVA (unequal variances); undefined if a group is constant
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = n / var
+        welch_mean = (w * mean).sum() / w.sum()
+        lam = ((1 - w / w.sum()) ** 2 / (n - 1)).sum()
+        welch_f = ((w * (mean - welch_mean) ** 2).sum() / (k - 1)) / (1 + 2 * (k - 2) / (k ** 2 - 1) * lam)
+        welch_df = (k ** 2 - 1) / (3 * lam)
+    welch_p = stats.f.sf(welch_f, k - 1, welch_df)
+
+    # Kruskal-Wallis on the shared ranks, with the tie correction
+    h = (12 / (N * (N + 1)) * (summary['rank_sum'].to_numpy() ** 2 / n).sum() - 3 * (N + 1)) / tie_correction
+    h_p = stats.chi2.sf(h, k - 1)
+
+    return {
+        'groups': k, 'n': int(N),
+        'anova_f': f_stat, 'anova_p': f_p,
+        'welch_f': welch_f, 'welch_df': welch_df, 'welch_p': welch_p,
+        'kruskal_h': h, 'kruskal_p': h_p,
+        'eta_squared': ss_between / (ss_between + ss_within)
+    }
+
+
+def post_hoc(summary):
+
+    n, mean, var = summary['n'].to_numpy(float), summary['mean'].to_numpy(), summary['var'].to_numpy()
+    k, N = len(n), n.sum()
+    i, j = np.array(list(combinations(range(k), 2))).T
+    diff = mean[j] - mean[i]
+
+    # Tukey HSD (pooled variance, Tukey-Kramer for unequal sizes)
+    ms_within = ((n - 1) * var).sum() / (N - k)
+    tukey_se = np.sqrt(ms_within / 2 * (1 / n[i] + 1 / n[j]))
+    tukey_p = stats.studentized_range.sf(np.abs(diff) / tukey_se, k, N - k)
+
+    # Games-Howell (per-group variances, Welch-Satterthwaite df)
+    a, b = var[i] / n[i], var[j] / n[j]
+    gh_se = np.sqrt((a + b) / 2)
+    gh_df = (a + b) ** 2 / (a ** 2 / (n[i] - 1) + b ** 2 / (n[j] - 1))
+    gh_p = stats.studentized_range.sf(np.abs(diff) / gh_se, k, gh_df)
+
+    groups = summary.index.to_numpy()
+    return pd.DataFrame({
+        'group1': groups[i], 'group2': groups[j], 'mean_diff': diff,
+        'tukey_p': np.minimum(tukey_p, 1), 'games_howell_p': np.minimum(gh_p, 1)
+    })
+
+
+def tie_correction(values):
+
+    # Kruskal-Wallis tie correction from the tie counts of the values
+    N = values.notna().sum()
+    ties = values.value_counts().to_numpy(float)
+    return 1 - (ties ** 3 - ties).sum() / (N ** 3 - N)
+
+
+def group_tests(df, value='avg_interest', by=GROUP_COLUMNS, min_group_size=2):
+
+    # Returns (omnibus table indexed by grouping column, post-hoc pairs,
+    # per-group summaries). Groups smaller than min_group_size carry no
+    # variance and are left out of the tests
+    by = [col for col in by if col in df.columns]
+    df = df[by + [value]].dropna(subset=[value])
+    df = df.assign(_rank=df[value].rank())
+    correction = tie_correction(df[value])
+
+    results, pairs, summaries = {}, [], {}
+    for col in by:
+        summary = group_statistics(df, value, col)
+        summaries[col] = summary
+        tested = summary[summary['n'] >= min_group_size]
+        if len(tested) < 2:
+            continue
+
+        if tested['n'].sum() < len(df):
+            # Rows without a (tested) group: Kruskal-Wallis needs the ranks
+            # among the remaining rows, so only this grouping is re-ranked
+            kept = df[df[col].isin(tested.index)]
+            kept = kept.assign(_rank=kept[value].rank())
+            results[col] = omnibus(group_statistics(kept, value, col), tie_correction(kept[value]))
+        else:
+            results[col] = omnibus(tested, correction)
+        pairs.append(post_hoc(tested).assign(grouping=col))
+
+    table = pd.DataFrame.from_dict(results, orient='index')
+    table.index.name = 'grouping'
+    if not pairs:
+        return table, pd.DataFrame(), summaries
+    pairs = pd.concat(pairs, ignore_index=True)
+    return table, pairs[['grouping'] + [c for c in pairs.columns if c != 'grouping']], summaries
@@ -0,0 +1,349 @@
+"""
+HTTP Response Cache - AI Adoption Project
+
+Persistent on-disk cache for collector responses. Bodies are stored once
+under their SHA-256 (content-addressed), a SQLite index maps request keys
+to bodies, and entries expire per source, are revalidated with
+ETag/Last-Modified, and are evicted least-recently-used past a size cap.
+
+Usage:
+    python scripts/http_cache.py            # show cache statistics
+    python scripts/http_cache.py --clear    # drop every cached response
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import requests
+
+DAY = 24 * 60 * 60
+
+# World Bank figures for closed years barely move; Trends and GitHub do
+DEFAULT_TTLS = {
+    'worldbank': 30 * DAY,
+    'trends': 7 * DAY,
+    'github': 1 * DAY,
+    'default': 1 * DAY
+}
+
+
+class OfflineCacheMiss(RuntimeError):
+    pass
+
+
+class ResponseCache:
+
+    def __init__(self, cache_dir="data/raw/cache", ttls=None, max_bytes=512 * 1024**2,
+                 offline=False):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.cache_dir / "index.sqlite", check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                body_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                meta TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _object_path(self, body_hash):
+        return self.objects_dir / body_hash[:2] / body_hash
+
+    def lookup(self, key):
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT source, body_hash, meta, etag, last_modified, stored_at FROM entries WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        source, body_hash, meta, etag, last_modified, stored_at = row
+        path = self._object_path(body_hash)
+        if not path.exists():
+            self.delete(key)
+            return None
+
+        return {
+            'key': key,
+            'source': source,
+            'body_hash': body_hash,
+            'meta': json.loads(meta),
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': stored_at
+        }
+
+    def is_fresh(self, entry):
+        ttl = self.ttls.get(entry['source'], self.ttls['default'])
+        return time.time() - entry['stored_at'] < ttl
+
+    def count(self, hit):
+
+        # Called from worker threads, so the counters move under the lock
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def read_body(self, entry):
+
+        # The entry may have been evicted since lookup(), so the row is
+        # checked again under the lock. None means a miss: refetch
+        with self._lock:
+            row = self._db.execute("SELECT body_hash FROM entries WHERE key = ?",
+                                   (entry['key'],)).fetchone()
+            if row is None or row[0] != entry['body_hash']:
+                return None
+            try:
+                body = self._object_path(entry['body_hash']).read_bytes()
+            except OSError:
+                self._delete_entries([entry['key']])
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?",
+                             (time.time(), entry['key']))
+            self._db.commit()
+        return body
+
+    def store(self, key, source, body, meta=None, etag=None, last_modified=None):
+
+        # The body is written to a private temporary file outside the lock;
+        # publishing it and indexing it happen together under the lock, so
+        # an eviction never sees an object without its index row
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._object_path(body_hash)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f"{body_hash}.{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(body)
+
+        now = time.time()
+        with self._lock:
+            tmp.replace(path)
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, body_hash, len(body), json.dumps(meta or {}),
+                 etag, last_modified, now, now)
+            )
+            self._db.commit()
+        self.evict()
+
+    def refresh(self, key):
+
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE entries SET stored_at = ?, last_access = ? WHERE key = ?",
+                             (now, now, key))
+            self._db.commit()
+
+    def delete(self, key):
+
+        with self._lock:
+            self._delete_entries([key])
+
+    def total_bytes(self):
+
+        with self._lock:
+            (total,) = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT body_hash, size FROM entries)"
+            ).fetchone()
+        return total
+
+    def evict(self):
+
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, body_hash, size FROM entries ORDER BY last_access ASC"
+            ).fetchall()
+            # A shared body only frees its size with its last reference
+            references = {}
+            for _, body_hash, _ in rows:
+                references[body_hash] = references.get(body_hash, 0) + 1
+            expired = []
+            for key, body_hash, size in rows:
+                if total <= self.max_bytes:
+                    break
+                expired.append(key)
+                references[body_hash] -= 1
+                if references[body_hash] == 0:
+                    total -= size
+            self._delete_entries(expired)
+
+    def _delete_entries(self, keys):
+
+        # Caller holds the lock. Only the bodies of the deleted rows are
+        # candidates, and a body is unlinked once no remaining row uses it
+        hashes = set()
+        for key in keys:
+            row = self._db.execute("SELECT body_hash FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                hashes.add(row[0])
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._db.commit()
+        for body_hash in hashes:
+            in_use = self._db.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1",
+                                      (body_hash,)).fetchone()
+            if in_use is None:
+                self._object_path(body_hash).unlink(missing_ok=True)
+
+    def get_or_compute(self, key_parts, source, compute, dumps, loads):
+
+        # For payloads that are not plain HTTP responses (e.g. pytrends frames).
+        # Returns (value, from_cache).
+        key = self.make_key(*key_parts)
+        entry = self.lookup(key)
+
+        if entry is not None and (self.offline or self.is_fresh(entry)):
+            body = self.read_body(entry)
+            if body is not None:
+                self.count(hit=True)
+                return loads(body), True
+
+        if self.offline:
+            raise OfflineCacheMiss(f"No cached {source} response for {key_parts}")
+
+        self.count(hit=False)
+        value = compute()
+        self.store(key, source, dumps(value))
+        return value, False
+
+    def stats(self):
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT source, COUNT(*), SUM(size) FROM entries GROUP BY source"
+            ).fetchall()
+        return {source: {'entries': count, 'bytes': size} for source, count, size in rows}
+
+    def clear(self):
+
+        with self._lock:
+            keys = [key for (key,) in self._db.execute("SELECT key FROM entries")]
+            self._delete_entries(keys)
+
+
+class CachedSession:
+
+    def __init__(self, cache, session=None, source='default'):
+        self.cache = cache
+        self.session = session or requests.Session()
+        self.source = source
+
+    def _cached_response(self, entry, body):
+
+        response = requests.Response()
+        response.status_code = entry['meta'].get('status', 200)
+        response.headers.update(entry['meta'].get('headers', {}))
+        response.url = entry['meta'].get('url', '')
+        response._content = body
+        response.encoding = entry['meta'].get('encoding')
+        response.from_cache = True
+        response.revalidated = False
+        return response
+
+    def get(self, url, params=None, source=None, headers=None, **kwargs):
+
+        source = source or self.source
+        key = self.cache.make_key('GET', url, params or {})
+        entry = self.cache.lookup(key)
+
+        if entry is not None and (self.cache.offline or self.cache.is_fresh(entry)):
+            body = self.cache.read_body(entry)
+            if body is not None:
+                self.cache.count(hit=True)
+                return self._cached_response(entry, body)
+            # Evicted since the lookup
+            entry = None
+
+        if self.cache.offline:
+            raise OfflineCacheMiss(f"No cached {source} response for {url}")
+
+        conditional = dict(headers or {})
+        if entry is not None:
+            if entry['etag']:
+                conditional['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                conditional['If-Modified-Since'] = entry['last_modified']
+
+        response = self.session.get(url, params=params, headers=conditional, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            body = self.cache.read_body(entry)
+            if body is not None:
+                self.cache.count(hit=True)
+                self.cache.refresh(key)
+                cached = self._cached_response(entry, body)
+                # A network round trip all the same: keep its live
+                # rate-limit headers and mark it for request counting
+                cached.headers.update(response.headers)
+                cached.revalidated = True
+                return cached
+            # Evicted while revalidating: fetch the body in full
+            response = self.session.get(url, params=params, headers=dict(headers or {}), **kwargs)
+
+        self.cache.count(hit=False)
+        response.from_cache = False
+        response.revalidated = False
+        if response.status_code == 200:
+            self.cache.store(
+                key, source, response.content,
+                meta={
+                    'status': 200,
+                    'url': response.url,
+                    'encoding': response.encoding,
+                    'headers': {k: v for k, v in response.headers.items()
+                                if k.lower() in ('content-type', 'link', 'etag', 'last-modified')}
+                },
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        return response
+
+
+def main():
+
+    cache = ResponseCache()
+
+    if '--clear' in sys.argv[1:]:
+        cache.clear()
+        print(f"Cache cleared: {cache.cache_dir}")
+        return
+
+    print(f"Cache directory: {cache.cache_dir}")
+    for source, stats in sorted(cache.stats().items()):
+        print(f"  {source:10s}: {stats['entries']:5d} entries, {stats['bytes']/1024:,.0f} KB")
+    print(f"  Total: {cache.total_bytes()/1024:,.0f} KB of {cache.max_bytes/1024**2:,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
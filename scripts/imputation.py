@@ -0,0 +1,165 @@
+"""
+Imputation - AI Adoption Project
+
+Fills missing World Bank indicators for every indicator column at once.
+The grouped mode uses the median of the country's region, then of its
+continent, then the global median: one groupby per level over all
+columns, then aligned fills, so the cost is linear in the number of
+rows. The KNN mode averages the k nearest countries that have the value,
+found through a KD-tree over the standardized indicators. Every filled
+cell is flagged in a <column>_imputed column.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from sketches import QuantileSketch
+
+INDICATOR_COLUMNS = ['gdp_per_capita', 'tertiary_education', 'internet_users_pct', 'population']
+IMPUTATION_LEVELS = ['region', 'continent']
+
+# Indicators spanning orders of magnitude are compared on a log scale in KNN
+LOG_SCALE_COLUMNS = {'gdp_per_capita', 'population'}
+
+
+def flag_column(col):
+    return f"{col}_imputed"
+
+
+def group_medians(df, columns=INDICATOR_COLUMNS, levels=IMPUTATION_LEVELS):
+
+    columns = [col for col in columns if col in df.columns]
+    stats = {level: df.groupby(level, observed=True)[columns].median()
+             for level in levels if level in df.columns}
+    stats['global'] = df[columns].median()
+    return stats
+
+
+def apply_medians(df, stats, columns=INDICATOR_COLUMNS):
+
+    columns = [col for col in columns if col in df.columns]
+    values = df[columns]
+    missing = values.isna()
+    filled = values
+    counts = {}
+
+    # Each level only fills what the levels before it could not
+    for level, medians in stats.items():
+        if level == 'global':
+            # A Series fill broadcasts down each column
+            fill = medians[columns]
+        else:
+            fill = medians[columns].reindex(df[level].to_numpy())
+            fill.index = df.index
+        before = filled.isna().to_numpy().sum(axis=0)
+        filled = filled.fillna(fill)
+        counts[level] = before - filled.isna().to_numpy().sum(axis=0)
+
+    for col in columns:
+        df[col] = filled[col]
+        df[flag_column(col)] = missing[col].to_numpy()
+    return df, pd.DataFrame(counts, index=columns)
+
+
+def impute_grouped(df, columns=INDICATOR_COLUMNS, levels=IMPUTATION_LEVELS):
+    return apply_medians(df, group_medians(df, columns, levels), columns)
+
+
+def impute_knn(df, columns=INDICATOR_COLUMNS, k=5, levels=IMPUTATION_LEVELS):
+
+    columns = [col for col in columns if col in df.columns]
+    values = df[columns].to_numpy(dtype=float, na_value=np.nan)
+    missing = np.isnan(values)
+
+    # Neighbour search space: every indicator standardized, with the gaps
+    # provisionally filled by the grouped medians so all rows can be placed
+    provisional, _ = impute_grouped(df[columns + [lvl for lvl in levels if lvl in df.columns]].copy(),
+                                    columns, levels)
+    space = provisional[columns].to_numpy(dtype=float)
+    for i, col in enumerate(columns):
+        if col in LOG_SCALE_COLUMNS:
+            space[:, i] = np.log10(np.clip(space[:, i], 1e-9, None))
+    space = (space - space.mean(axis=0)) / np.where(space.std(axis=0) > 0, space.std(axis=0), 1)
+
+    filled = values.copy()
+    for i, col in enumerate(columns):
+        rows = np.flatnonzero(missing[:, i])
+        donors = np.flatnonzero(~missing[:, i])
+        if not len(rows) or not len(donors):
+            continue
+        # The column being filled is left out of the distance
+        other = [j for j in range(len(columns)) if j != i] or [i]
+        tree = cKDTree(space[donors][:, other])
+        _, idx = tree.query(space[rows][:, other], k=min(k, len(donors)))
+        idx = idx.reshape(len(rows), -1)
+        filled[rows, i] = values[donors[idx], i].mean(axis=1)
+
+    counts = {}
+    for i, col in enumerate(columns):
+        df[col] = filled[:, i]
+        df[flag_column(col)] = missing[:, i]
+        counts[col] = missing[:, i].sum()
+    return df, pd.DataFrame({'knn': counts})
+
+
+class GroupMedianSketch:
+
+    # Streaming counterpart of group_medians: one mergeable quantile sketch
+    # per (level, group, column), so chunked cleaning can impute with the
+    # same region -> continent -> global medians in bounded memory
+
+    def __init__(self, columns=INDICATOR_COLUMNS, levels=IMPUTATION_LEVELS, k=200):
+        self.columns = list(columns)
+        self.levels = list(levels)
+        self.k = k
+        self.sketches = {}
+
+    def _sketch(self, level, group, col):
+        key = (level, group, col)
+        if key not in self.sketches:
+            self.sketches[key] = QuantileSketch(self.k)
+        return self.sketches[key]
+
+    def update(self, df):
+
+        columns = [col for col in self.columns if col in df.columns]
+        for level in self.levels:
+            if level not in df.columns:
+                continue
+            for group, frame in df.groupby(level, observed=True)[columns]:
+                for col in columns:
+                    self._sketch(level, group, col).update(frame[col].to_numpy(dtype=float, na_value=np.nan))
+        for col in columns:
+            self._sketch('global', None, col).update(df[col].to_numpy(dtype=float, na_value=np.nan))
+        return self
+
+    def count(self, col):
+        sketch = self.sketches.get(('global', None, col))
+        return sketch.count if sketch else 0
+
+    def medians(self):
+
+        stats = {}
+        for level in self.levels:
+            rows = {}
+            for (lvl, group, col), sketch in self.sketches.items():
+                if lvl == level:
+                    rows.setdefault(group, {})[col] = sketch.median()
+            if rows:
+                stats[level] = pd.DataFrame.from_dict(rows, orient='index')
+        stats['global'] = pd.Series({col: sketch.median()
+                                     for (lvl, _, col), sketch in self.sketches.items() if lvl == 'global'})
+        return stats
+
+    def to_dict(self):
+        return {'columns': self.columns, 'levels': self.levels, 'k': self.k,
+                'sketches': [[level, group, col, sketch.to_dict()]
+                             for (level, group, col), sketch in self.sketches.items()]}
+
+    @classmethod
+    def from_dict(cls, state):
+        median_sketch = cls(state['columns'], state['levels'], state['k'])
+        for level, group, col, sketch in state['sketches']:
+            median_sketch.sketches[(level, group, col)] = QuantileSketch.from_dict(sketch)
+        return median_sketch
@@ -0,0 +1,79 @@
+"""
+Collection Journal - AI Adoption Project
+
+Append-only JSON-lines journal for long collection runs. Every finished
+unit (a country, or a country/tool batch) is written and fsync'ed as soon
+as it completes, so an interrupted run resumes where it stopped. Once a
+collector finishes, the journal is compacted into its final CSV.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class CollectionJournal:
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.records = {}
+
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-write can leave a torn last line
+                        continue
+                    self.records[entry['key']] = entry['record']
+
+        self.resumed = len(self.records)
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, key, default=None):
+        return self.records.get(key, default)
+
+    def append(self, key, record):
+
+        line = json.dumps({'key': key, 'record': record}, default=_to_json) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.records[key] = record
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def compact(self, tables, keep=False):
+
+        # Write every final table atomically, then drop the journal unless
+        # some units failed and should be retried by the next run
+        for output_file, df in tables.items():
+            output_file = Path(output_file)
+            tmp = output_file.with_suffix(output_file.suffix + '.tmp')
+            df.to_csv(tmp, index=False)
+            os.replace(tmp, output_file)
+
+        self.close()
+        if not keep:
+            self.path.unlink(missing_ok=True)
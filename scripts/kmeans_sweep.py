@@ -0,0 +1,148 @@
+"""
+K-Means Sweep - AI Adoption Project
+
+Fits K-means for a range of k on a process pool. The scaled feature
+matrix is placed in shared memory once, and every worker maps it instead
+of receiving a pickled copy per task. Each worker is limited to one BLAS/
+OpenMP thread, so the pool does not oversubscribe the cores. Fitted
+models are cached on disk under a hash of the data, k and the fit
+settings. A rerun, or the final clustering for the chosen k, loads the
+fit instead of repeating it. Silhouettes are scored afterwards, for all
+new fits together, over one shared distance matrix (see silhouette.py).
+"""
+
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+from silhouette import MAX_EXACT, SAMPLE_SIZE, silhouette_scores
+
+CACHE_DIR = Path("data/processed/.cluster_cache")
+
+_shared = {}
+
+
+def data_hash(X):
+
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    digest = hashlib.sha256(repr(X.shape).encode())
+    digest.update(X.tobytes())
+    return digest.hexdigest()
+
+
+class ModelCache:
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, key):
+
+        if self.cache_dir is None or not self._path(key).exists():
+            return None
+        try:
+            return pickle.loads(self._path(key).read_bytes())
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Unreadable entry (e.g. written by another sklearn); refit
+            return None
+
+    def put(self, key, value):
+
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(key).with_suffix('.tmp')
+        tmp.write_bytes(pickle.dumps(value))
+        os.replace(tmp, self._path(key))
+
+
+def model_key(X_hash, k, random_state, n_init, max_exact, sample_size):
+    # The silhouette settings are part of the key: they decide whether the
+    # cached score is exact or sampled
+    return f"kmeans_{X_hash[:32]}_k{k}_rs{random_state}_n{n_init}_sil{max_exact}-{sample_size}"
+
+
+def _init_worker(name, shape, dtype):
+
+    from threadpoolctl import threadpool_limits
+
+    # Keep the shared-memory handle alive for the worker's lifetime
+    block = shared_memory.SharedMemory(name=name)
+    _shared['block'] = block
+    _shared['X'] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _shared['limits'] = threadpool_limits(1)
+
+
+def shared_matrix():
+    # The matrix of the pool this worker belongs to
+    return _shared['X']
+
+
+@contextmanager
+def shared_pool(X, workers):
+
+    # Process pool whose workers all map one shared-memory copy of X
+    block = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    try:
+        np.ndarray(X.shape, dtype=X.dtype, buffer=block.buf)[:] = X
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(block.name, X.shape, X.dtype)) as pool:
+            yield pool
+    finally:
+        block.close()
+        block.unlink()
+
+
+def fit_kmeans(X, k, random_state=42, n_init=10):
+
+    model = KMeans(n_clusters=k, random_state=random_state, n_init=n_init).fit(X)
+    return {'k': k, 'model': model, 'inertia': model.inertia_}
+
+
+def _fit_shared(k, random_state, n_init):
+    return fit_kmeans(shared_matrix(), k, random_state, n_init)
+
+
+def sweep(X, k_values, random_state=42, n_init=10, workers=None, cache=None,
+          max_exact=MAX_EXACT, sample_size=SAMPLE_SIZE):
+
+    # Returns {k: {'k', 'model', 'inertia', 'silhouette', 'silhouette_se',
+    # 'silhouette_sampled'}}, from the cache where possible; only the
+    # missing k are fitted
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    cache = cache or ModelCache()
+    X_hash = data_hash(X)
+    results = {}
+    missing = []
+    for k in k_values:
+        cached = cache.get(model_key(X_hash, k, random_state, n_init, max_exact, sample_size))
+        if cached is not None:
+            results[k] = cached
+        else:
+            missing.append(k)
+
+    workers = min(workers or os.cpu_count() or 1, len(missing))
+    if workers <= 1:
+        fitted = [fit_kmeans(X, k, random_state, n_init) for k in missing]
+    else:
+        with shared_pool(X, workers) as pool:
+            # Largest k first: they take longest, so the pool drains evenly
+            order = sorted(missing, reverse=True)
+            fitted = list(pool.map(_fit_shared, order, [random_state] * len(order), [n_init] * len(order)))
+
+    scores = silhouette_scores(X, {result['k']: result['model'].labels_ for result in fitted},
+                               max_exact, sample_size, seed=random_state)
+    for result in fitted:
+        result.update(scores[result['k']])
+        cache.put(model_key(X_hash, result['k'], random_state, n_init, max_exact, sample_size), result)
+        results[result['k']] = result
+    return {k: results[k] for k in k_values}
@@ -0,0 +1,145 @@
+"""
+Memory Budget - AI Adoption Project
+
+Keeps the cleaning stage inside a fixed RAM budget for its working frame.
+MemoryReport records the frame size, process RSS and peak RSS of every
+step. downcast() shrinks a frame only as far as the budget needs:
+lossless steps come first (low-cardinality strings to categoricals,
+integers to the narrowest type), then float64 to float32.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+MB = 1024 ** 2
+
+# Strings repeated at least this often on average become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+
+def enable_copy_on_write():
+
+    # Default from pandas 3; earlier versions need the option so column
+    # assignment and fillna do not copy the columns they leave untouched
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _lossless(df):
+
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            if df[col].nunique(dropna=True) <= CATEGORY_MAX_RATIO * max(len(df), 1):
+                df[col] = df[col].astype('category')
+        elif isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+            df[col] = pd.to_numeric(df[col], downcast='integer' if dtype.kind == 'i' else 'unsigned')
+    return df
+
+
+def _floats(df):
+
+    for col in df.columns:
+        if df[col].dtype == np.float64:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def downcast(df, budget_bytes):
+
+    applied = []
+    for name, step in (('categoricals/ints', _lossless), ('float32', _floats)):
+        if frame_bytes(df) <= budget_bytes:
+            break
+        df = step(df)
+        applied.append(name)
+
+    size = frame_bytes(df)
+    if size > budget_bytes:
+        print(f"Warning: frame is {size / MB:.1f} MB after downcasting, "
+              f"over the {budget_bytes / MB:.1f} MB budget")
+    return df, applied
+
+
+def rss_bytes():
+
+    # Resident set size of this process: /proc on Linux, psutil elsewhere
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class MemoryReport:
+
+    # Samples process RSS on a background thread for the peak of each step.
+    # Cheaper than tracemalloc, which slows allocation-heavy pandas code
+    # (CSV writing especially) down several times
+
+    def __init__(self, budget_bytes=None, enabled=True, interval=0.005):
+        self.budget_bytes = budget_bytes
+        self.enabled = enabled and rss_bytes() is not None
+        self.interval = interval
+        self.steps = []
+        self._peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, rss_bytes())
+
+    def __enter__(self):
+        if self.enabled:
+            self._peak = rss_bytes()
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+
+    def step(self, name, df=None):
+
+        if not self.enabled:
+            return
+        current = rss_bytes()
+        self.steps.append({
+            'step': name,
+            'frame_mb': round(frame_bytes(df) / MB, 2) if df is not None else np.nan,
+            'rss_mb': round(current / MB, 1),
+            'peak_rss_mb': round(max(self._peak, current) / MB, 1)
+        })
+        self._peak = current
+
+    def print_report(self):
+
+        if not self.steps:
+            return
+        report = pd.DataFrame(self.steps)
+        print("\nMemory by step (MB):")
+        print(report.to_string(index=False))
+        print(f"Process peak: {report['peak_rss_mb'].max():.1f} MB")
+        # The frame as loaded precedes any downcasting, so the budget is
+        # checked against the steps after it
+        working = report['frame_mb'].iloc[1:]
+        if self.budget_bytes is not None and working.notna().any():
+            largest = working.max()
+            status = 'within' if largest * MB <= self.budget_bytes else 'OVER'
+            print(f"Largest working frame: {largest:.1f} MB, {status} the "
+                  f"{self.budget_bytes / MB:g} MB budget")
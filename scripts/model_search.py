@@ -0,0 +1,218 @@
+"""
+Model Search - AI Adoption Project
+
+Fits many linear specifications of avg_interest in one pass: every feature
+subset, with and without pairwise interactions, on all countries and on
+each region and continent. For each row subset the cross-product (Gram)
+matrix of all candidate columns is computed once. A specification is then
+just an index into it: the specs of one size are gathered into a stack of
+small systems and solved together with batched Cholesky factorisations.
+The results come back as one ranked table with R², adjusted R², AIC, BIC
+and standardized coefficients. The statistics stage runs the full search
+as part of its regression analysis; this script runs it on its own, with
+options.
+
+Usage:
+    python scripts/model_search.py
+    python scripts/model_search.py --features gdp_per_capita internet_users_pct --max-interactions 1
+"""
+
+import argparse
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from storage import load_table
+
+FEATURES = ['gdp_per_capita', 'tertiary_education', 'internet_users_pct', 'population']
+TARGET = 'avg_interest'
+GROUP_LEVELS = ['region', 'continent']
+OUTPUT_PATH = Path("data/processed/model_search.csv")
+
+
+def interaction_name(a, b):
+    return f"{a}:{b}"
+
+
+def design_matrix(df, features, target=TARGET):
+
+    # Interactions are products of globally standardized main effects
+    data = df[features + [target]].dropna()
+    base = data[features].to_numpy(dtype=np.float64)
+    base = (base - base.mean(axis=0)) / np.where(base.std(axis=0) > 0, base.std(axis=0), 1)
+
+    columns = list(features)
+    blocks = [base]
+    for i, j in combinations(range(len(features)), 2):
+        columns.append(interaction_name(features[i], features[j]))
+        blocks.append((base[:, i] * base[:, j])[:, None])
+
+    return data.index, np.hstack(blocks), data[target].to_numpy(dtype=np.float64), columns
+
+
+def specifications(features, columns, max_features=None, max_interactions=None):
+
+    position = {name: i for i, name in enumerate(columns)}
+    max_features = max_features or len(features)
+    specs = []
+    for size in range(1, max_features + 1):
+        for subset in combinations(features, size):
+            # Interactions only among the features in the model (hierarchy)
+            pairs = [interaction_name(a, b) for a, b in combinations(subset, 2)]
+            limit = len(pairs) if max_interactions is None else min(max_interactions, len(pairs))
+            for n_pairs in range(limit + 1):
+                for chosen in combinations(pairs, n_pairs):
+                    specs.append(tuple(position[name] for name in subset + chosen))
+    return specs
+
+
+def centred_gram(X, y):
+
+    # Standardized Gram matrix of [X | y] over these rows, plus n and the
+    # column scales needed to tell constant columns apart
+    n = len(y)
+    Z = np.column_stack([X, y])
+    Z = Z - Z.mean(axis=0)
+    scale = np.sqrt((Z ** 2).sum(axis=0) / n)
+    usable = scale > 1e-12
+    Z = Z / np.where(usable, scale, 1)
+    return Z.T @ Z, usable, n, scale[-1]
+
+
+def solve_batch(gram, idx):
+
+    # idx: (m, k) column indices; the last row/column of gram is the target
+    A = gram[idx[:, :, None], idx[:, None, :]]
+    g = gram[idx, -1]
+    coef = np.full(idx.shape, np.nan)
+    ok = np.ones(len(idx), dtype=bool)
+    try:
+        L = np.linalg.cholesky(A)
+    except np.linalg.LinAlgError:
+        # Some systems are singular (collinear columns in a small subset):
+        # factor them one by one and leave the failures as NaN
+        L = np.zeros_like(A)
+        for m in range(len(A)):
+            try:
+                L[m] = np.linalg.cholesky(A[m])
+            except np.linalg.LinAlgError:
+                ok[m] = False
+                L[m] = np.eye(A.shape[1])
+    z = np.linalg.solve(L, g[:, :, None])
+    coef[ok] = np.linalg.solve(L.transpose(0, 2, 1), z)[ok, :, 0]
+    return coef
+
+
+def group_specs(specs, columns):
+
+    # Specs of one size share a batch; their labels are built once
+    by_size = {}
+    for spec in specs:
+        by_size.setdefault(len(spec), []).append(spec)
+    return {size: (np.array(group), np.array([' + '.join(columns[c] for c in spec) for spec in group]))
+            for size, group in by_size.items()}
+
+
+def fit_subset(X, y, batches, columns, label, min_resid_dof=2):
+
+    gram, usable, n, y_scale = centred_gram(X, y)
+    if not usable[-1]:
+        return []
+    yy = gram[-1, -1]
+
+    frames = []
+    for size, (idx, labels) in batches.items():
+        k = size + 1
+        if n - k < min_resid_dof:
+            continue
+        keep = usable[idx].all(axis=1)
+        idx, labels = idx[keep], labels[keep]
+        if not len(idx):
+            continue
+
+        coef = solve_batch(gram, idx)
+        solved = ~np.isnan(coef).any(axis=1)
+        idx, labels, coef = idx[solved], labels[solved], coef[solved]
+
+        rss = yy - np.einsum('mk,mk->m', coef, gram[idx, -1])
+        r2 = 1 - rss / yy
+        # Standardized y: RSS on the original scale only shifts AIC/BIC by a
+        # constant within a subset, so the rankings are unaffected
+        loglik_term = n * np.log(np.maximum(rss, 1e-300) / n)
+
+        # Coefficients per standard deviation of the feature, in units of y,
+        # scattered into one wide block (NaN where a column is not in the spec)
+        wide = np.full((len(idx), len(columns)), np.nan)
+        wide[np.arange(len(idx))[:, None], idx] = coef * y_scale
+
+        frame = pd.DataFrame({
+            'subset': label, 'spec': labels, 'n': n, 'k': k, 'r2': r2,
+            'adj_r2': 1 - (1 - r2) * (n - 1) / (n - k),
+            'aic': loglik_term + 2 * k, 'bic': loglik_term + k * np.log(n)
+        })
+        frames.append(pd.concat([frame, pd.DataFrame(wide, columns=[f"coef_{c}" for c in columns])], axis=1))
+    return frames
+
+
+def search(df, features=FEATURES, target=TARGET, levels=GROUP_LEVELS,
+           max_features=None, max_interactions=None):
+
+    index, X, y, columns = design_matrix(df, features, target)
+    specs = specifications(features, columns, max_features, max_interactions)
+    batches = group_specs(specs, columns)
+
+    subsets = [('all', np.ones(len(y), dtype=bool))]
+    for level in levels:
+        if level not in df.columns:
+            continue
+        groups = df.loc[index, level].to_numpy()
+        for group in pd.unique(groups[pd.notna(groups)]):
+            subsets.append((f"{level}={group}", groups == group))
+
+    frames = []
+    for label, mask in subsets:
+        frames.extend(fit_subset(X[mask], y[mask], batches, columns, label))
+    if not frames:
+        return pd.DataFrame(), len(specs)
+
+    table = pd.concat(frames, ignore_index=True)
+    table.insert(1, 'rank', table.groupby('subset')['bic'].rank(method='first').astype(int))
+    # Drop coefficient columns no fitted spec used
+    table = table.dropna(axis=1, how='all')
+    return table.sort_values(['subset', 'rank']).reset_index(drop=True), len(specs)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--features', nargs='+', default=FEATURES)
+    parser.add_argument('--max-features', type=int, default=None)
+    parser.add_argument('--max-interactions', type=int, default=None)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    df = load_table('cleaned', columns=args.features + [TARGET] + GROUP_LEVELS)
+    table, n_specs = search(df, args.features, max_features=args.max_features,
+                            max_interactions=args.max_interactions)
+    report(table, n_specs, args.top)
+
+
+def report(table, n_specs, top=10):
+
+    print("="*80)
+    print(f"MODEL SEARCH: {n_specs} specifications x {table['subset'].nunique()} row subsets "
+          f"= {len(table)} fitted models")
+    print("="*80)
+    print(table[table['subset'] == 'all'].head(top)[['rank', 'spec', 'r2', 'adj_r2', 'aic', 'bic']]
+          .to_string(index=False))
+
+    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nFull table saved: {OUTPUT_PATH}")
+    return table
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,15 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from pathlib import Path
 
+from storage import load_table
+
+OUTLIER_COLUMNS = ['country_code', 'country_name', 'avg_interest', 'gdp_per_capita',
+                   'internet_users_pct', 'tertiary_education', 'population',
+                   'economic_category', 'region', 'ai_adoption_score']
+
 def load_data():
     
-    df = pd.read_csv('data/processed/ai_adoption_cleaned.csv')
+    df = load_table('cleaned', columns=OUTLIER_COLUMNS)
     print(f"Loaded {len(df)} countries\n")
     return df
 
@@ -111,7 +117,7 @@ def create_outlier_visualizations(df, outliers):
     print("\nGenerating outlier visualizations...")
     
     df_plot = df.copy()
-    df_plot['population'].fillna(df_plot['population'].median(), inplace=True)
+    df_plot['population'] = df_plot['population'].fillna(df_plot['population'].median())
     df_plot['category'] = 'Normal'
     
     high_ai_low_gdp_codes = outliers['high_ai_low_gdp']['country_code'].tolist()
@@ -167,9 +173,10 @@ def create_outlier_visualizations(df, outliers):
     
     return fig1, fig2
 
-def main():
+def main(df=None):
     
-    df = load_data()
+    if df is None:
+        df = load_data()
     
     outliers = identify_outliers(df)
     
@@ -0,0 +1,78 @@
+"""
+Rate Limiting - AI Adoption Project
+
+Adaptive token bucket shared by the collectors. The refill rate grows
+additively while requests succeed and is cut multiplicatively on a 429
+(AIMD), so collection runs close to whatever the API currently allows.
+"""
+
+import threading
+import time
+
+
+class AdaptiveTokenBucket:
+
+    def __init__(self, rate=0.5, capacity=1, min_rate=0.05, max_rate=2.0,
+                 increase=0.02, decrease=0.5):
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.successes = 0
+        self.throttles = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+
+        with self._lock:
+            self.successes += 1
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = 0
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+
+    def call(self, fetch, is_throttle, retries=4, retry_after=None):
+
+        # Runs fetch() under the limiter, retrying while is_throttle(exc) holds
+        for attempt in range(retries + 1):
+            self.acquire()
+            try:
+                result = fetch()
+            except Exception as e:
+                if not is_throttle(e) or attempt == retries:
+                    raise
+                self.on_throttle(retry_after(e) if retry_after else None)
+                continue
+            self.on_success()
+            return result
@@ -0,0 +1,295 @@
+"""
+Record/Replay Transport - AI Adoption Project
+
+Patches the requests transport (HTTPAdapter.send) so that everything the
+collectors do, including the HTTP calls pytrends' TrendReq makes itself,
+can be recorded to JSON fixtures and replayed offline. Replay can add
+latency and random 429/503 errors. Requests with no fixture can fall
+back to synthetic World Bank, Google Trends and GitHub responders.
+
+Usage:
+    python scripts/replay.py record        # run the collectors live and record fixtures
+"""
+
+import base64
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from world_bank_stub import stub_rows
+
+FIXTURES_DIR = Path("data/fixtures/http")
+
+
+class FixtureMissing(requests.ConnectionError):
+    pass
+
+
+def request_key(request):
+
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode()
+    return hashlib.sha256(request.method.encode() + b' ' + request.url.encode() + b'\n' + body).hexdigest()
+
+
+def build_response(request, status, headers=None, body=b'', reason=''):
+
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers or {})
+    response._content = body if isinstance(body, bytes) else body.encode()
+    response.encoding = 'utf-8'
+    response.url = request.url
+    response.request = request
+    response.reason = reason
+    return response
+
+
+class ReplayTransport:
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, mode='replay', latency=0.0, error_rate=0.0,
+                 error_status=429, retry_after=0, fallback=None, seed=0):
+        if mode not in ('replay', 'record'):
+            raise ValueError("mode must be 'replay' or 'record'")
+        self.fixtures_dir = Path(fixtures_dir)
+        self.mode = mode
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.fallback = fallback
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._original_send = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.requests = 0
+        self.injected_errors = 0
+        self.adapter_retries = 0
+        self.fixture_hits = 0
+        self.synthetic = 0
+
+    def _fixture_path(self, key):
+        return self.fixtures_dir / key[:2] / f"{key}.json"
+
+    def _record(self, request, response):
+
+        path = self._fixture_path(request_key(request))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            body = {'text': response.content.decode('utf-8')}
+        except UnicodeDecodeError:
+            body = {'base64': base64.b64encode(response.content).decode()}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'method': request.method,
+                'url': request.url,
+                'status': response.status_code,
+                'headers': dict(response.headers),
+                **body
+            }, f)
+
+    def _replay(self, request):
+
+        path = self._fixture_path(request_key(request))
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                fixture = json.load(f)
+            body = fixture['text'].encode() if 'text' in fixture else base64.b64decode(fixture['base64'])
+            # Transfer encodings do not apply to the already-decoded body
+            headers = {k: v for k, v in fixture['headers'].items()
+                       if k.lower() not in ('content-encoding', 'transfer-encoding', 'content-length')}
+            with self._lock:
+                self.fixture_hits += 1
+            return build_response(request, fixture['status'], headers, body)
+
+        if self.fallback is not None:
+            with self._lock:
+                self.synthetic += 1
+            return self.fallback(request)
+
+        raise FixtureMissing(f"No fixture for {request.method} {request.url}", request=request)
+
+    def _send_once(self, adapter, request, **kwargs):
+
+        with self._lock:
+            self.requests += 1
+            inject = self.random.random() < self.error_rate
+
+        if self.mode == 'record':
+            response = self._original_send(adapter, request, **kwargs)
+            self._record(request, response)
+            return response
+
+        if self.latency:
+            time.sleep(self.latency)
+        if inject:
+            with self._lock:
+                self.injected_errors += 1
+            return build_response(request, self.error_status,
+                                  {'Retry-After': str(self.retry_after), 'Content-Type': 'text/plain'},
+                                  b'Injected error: rate limit', reason='Injected')
+        return self._replay(request)
+
+    def _send(self, adapter, request, **kwargs):
+
+        # Emulate the adapter's urllib3 status retries, which the real
+        # transport would apply below this layer
+        retry = adapter.max_retries
+        attempts = retry.total if retry.total and retry.status_forcelist else 0
+        for attempt in range(attempts + 1):
+            response = self._send_once(adapter, request, **kwargs)
+            if attempt == attempts or response.status_code not in retry.status_forcelist:
+                return response
+            with self._lock:
+                self.adapter_retries += 1
+            time.sleep(retry.backoff_factor * 2 ** attempt)
+
+    def __enter__(self):
+
+        transport = self
+        self._original_send = HTTPAdapter.send
+
+        def send(adapter, request, **kwargs):
+            return transport._send(adapter, request, **kwargs)
+
+        HTTPAdapter.send = send
+        return self
+
+    def __exit__(self, *exc):
+        HTTPAdapter.send = self._original_send
+
+
+def _stable_int(*parts):
+    return int.from_bytes(hashlib.sha256('|'.join(map(str, parts)).encode()).digest()[:4], 'big')
+
+
+def synthetic_world_bank(request):
+
+    url = urlsplit(request.url)
+    parts = [p for p in url.path.split('/') if p]
+    params = {k: v[0] for k, v in parse_qs(url.query).items()}
+    first_year, last_year = (int(y) for y in params.get('date', '2022:2024').split(':'))
+    per_page = int(params.get('per_page', 50))
+    page = int(params.get('page', 1))
+
+    rows = stub_rows(parts[2].split(';'), parts[4].split(';'), first_year, last_year)
+    pages = max(1, -(-len(rows) // per_page))
+    meta = {'page': page, 'pages': pages, 'per_page': per_page, 'total': len(rows)}
+    body = json.dumps([meta, rows[(page - 1) * per_page:page * per_page]])
+    return build_response(request, 200, {'Content-Type': 'application/json'}, body)
+
+
+def synthetic_trends(request, country_codes):
+
+    url = urlsplit(request.url)
+    params = {k: v[0] for k, v in parse_qs(url.query).items()}
+    js = {'Content-Type': 'application/json; charset=utf-8'}
+
+    if url.path.endswith('/api/explore'):
+        req = json.loads(params['req'])
+        items = req['comparisonItem']
+        widget_request = {
+            'keywords': [item['keyword'] for item in items],
+            'geo': items[0]['geo'],
+            'time': items[0]['time']
+        }
+        widgets = [
+            {'id': 'TIMESERIES', 'token': 'synthetic', 'request': dict(widget_request)},
+            {'id': 'GEO_MAP', 'token': 'synthetic', 'request': dict(widget_request)}
+        ]
+        return build_response(request, 200, js, ")]}'" + json.dumps({'widgets': widgets}))
+
+    if url.path.endswith('/widgetdata/multiline'):
+        req = json.loads(params['req'])
+        start, end = req['time'].split(' ')
+        weeks = pd.date_range(start, end, freq='W-SUN')
+        timeline = [
+            {'time': str(int(week.timestamp())),
+             'value': [_stable_int(kw, req['geo'], week) % 101 for kw in req['keywords']]}
+            for week in weeks
+        ]
+        return build_response(request, 200, js, ")]}'," + json.dumps({'default': {'timelineData': timeline}}))
+
+    if url.path.endswith('/widgetdata/comparedgeo'):
+        req = json.loads(params['req'])
+        geo_map = [
+            {'geoCode': code, 'geoName': code,
+             'value': [_stable_int(kw, code) % 101 for kw in req['keywords']]}
+            for code in country_codes
+        ]
+        return build_response(request, 200, js, ")]}'," + json.dumps({'default': {'geoMapData': geo_map}}))
+
+    # Cookie bootstrap (explore page) and anything else
+    return build_response(request, 200, {'Content-Type': 'text/html'}, b'')
+
+
+def synthetic_github(request, pages=3):
+
+    url = urlsplit(request.url)
+    params = {k: v[0] for k, v in parse_qs(url.query).items()}
+    page = int(params.get('page', 1))
+    per_page = int(params.get('per_page', 30))
+    total = _stable_int(params.get('q', '')) % (pages * per_page)
+    count = max(0, min(per_page, total - (page - 1) * per_page))
+    items = [{'stargazers_count': 10000 // ((page - 1) * per_page + i + 1)} for i in range(count)]
+
+    headers = {
+        'Content-Type': 'application/json',
+        'X-RateLimit-Remaining': '1000',
+        'X-RateLimit-Reset': str(int(time.time()) + 60),
+        'ETag': f'"{_stable_int(request.url):08x}"'
+    }
+    if page * per_page < total:
+        next_params = dict(params, page=page + 1)
+        query = '&'.join(f"{k}={requests.utils.quote(str(v))}" for k, v in next_params.items())
+        headers['Link'] = f'<{url.scheme}://{url.netloc}{url.path}?{query}>; rel="next"'
+    return build_response(request, 200, headers, json.dumps({'total_count': total, 'items': items}))
+
+
+def synthetic_responder(country_codes):
+
+    def respond(request):
+        host = urlsplit(request.url).netloc
+        if 'worldbank' in host:
+            return synthetic_world_bank(request)
+        if 'trends.google' in host:
+            return synthetic_trends(request, country_codes)
+        if 'github' in host:
+            return synthetic_github(request)
+        return build_response(request, 404, {}, b'')
+
+    return respond
+
+
+def main():
+
+    if sys.argv[1:2] != ['record']:
+        print(__doc__)
+        return
+
+    from data_collection import AIAdoptionCollector
+
+    with ReplayTransport(mode='record') as transport:
+        collector = AIAdoptionCollector()
+        collector.cache.clear()
+        collector.collect_world_bank_data()
+        collector.collect_google_trends('ChatGPT')
+        collector.collect_github_data()
+    print(f"\nRecorded {transport.requests} requests to {transport.fixtures_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Rolling Correlation - AI Adoption Project
+
+How the cross-country relationship between an indicator (GDP per capita
+by default) and AI interest changes over time. The weekly Trends series
+of one tool is averaged over a sliding window of weeks for every country.
+Each window gives a cross-sectional Pearson correlation and a regression
+slope across countries. Window means come from cumulative sums along the
+week axis, and the per-window cross-country sums are column reductions.
+Every window therefore costs O(countries), however long the window is.
+The result is a weekly time series for the visualization layer.
+
+Usage:
+    python scripts/rolling_correlation.py
+    python scripts/rolling_correlation.py --tool "GitHub Copilot" --window 26 --indicator internet_users_pct
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from imputation import LOG_SCALE_COLUMNS
+from storage import load_table
+from trends_features import WEEKLY_DIR, load_weekly, tool_slug
+
+OUTPUT_PATH = Path("data/processed/rolling_correlation.csv")
+RESULT_COLUMNS = ['tool', 'indicator', 'window_start', 'week', 'countries', 'correlation', 'slope',
+                  'mean_interest', 'window_weeks']
+
+
+def window_means(matrix, window, min_periods=None):
+
+    # Mean of every country's series over each window of `window` weeks,
+    # NaN where fewer than min_periods weeks have data
+    if window < 1:
+        raise ValueError(f"window must be at least 1 week, got {window}")
+    if min_periods is None:
+        min_periods = (window + 1) // 2
+    values = np.asarray(matrix, dtype=np.float64)
+    valid = ~np.isnan(values)
+    zeros = np.zeros((len(values), 1))
+    sums = np.hstack([zeros, np.cumsum(np.where(valid, values, 0.0), axis=1)])
+    counts = np.hstack([zeros, np.cumsum(valid, axis=1)])
+
+    window_sums = sums[:, window:] - sums[:, :-window]
+    window_counts = counts[:, window:] - counts[:, :-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = window_sums / window_counts
+    means[window_counts < min_periods] = np.nan
+    return means
+
+
+def cross_sectional_fit(x, Y):
+
+    # Pearson r and OLS slope of each column of Y (countries x windows) on
+    # x across the countries present in that column
+    mask = ~np.isnan(Y) & ~np.isnan(x)[:, None]
+    # Centring x once keeps the sums well conditioned
+    x = np.where(np.isnan(x), 0.0, x - np.nanmean(x))[:, None]
+    Yz = np.where(mask, Y, 0.0)
+
+    n = mask.sum(axis=0)
+    sum_x, sum_y = (mask * x).sum(axis=0), Yz.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = (Yz * x).sum(axis=0) - sum_x * sum_y / n
+        var_x = (mask * x ** 2).sum(axis=0) - sum_x ** 2 / n
+        var_y = (Yz ** 2).sum(axis=0) - sum_y ** 2 / n
+        r = cov / np.sqrt(var_x * var_y)
+        slope = cov / var_x
+        mean_y = sum_y / n
+    r[n < 3] = np.nan
+    slope[n < 3] = np.nan
+    return n, np.clip(r, -1, 1), slope, mean_y
+
+
+def rolling_correlation(matrix, country_codes, weeks, indicator_values, window=12, min_periods=None):
+
+    # indicator_values: Series indexed by country_code
+    x = pd.Series(indicator_values).reindex(country_codes).to_numpy(dtype=np.float64, na_value=np.nan)
+    Y = window_means(matrix, window, min_periods)
+    n, r, slope, mean_y = cross_sectional_fit(x, Y)
+
+    weeks = pd.DatetimeIndex(weeks)
+    return pd.DataFrame({
+        'window_start': weeks[:len(weeks) - window + 1],
+        'week': weeks[window - 1:],
+        'countries': n,
+        'correlation': r,
+        'slope': slope,
+        'mean_interest': mean_y
+    })
+
+
+def main(df=None, tool='ChatGPT', indicator='gdp_per_capita', window=12, min_periods=None):
+
+    if window < 1:
+        raise SystemExit(f"Window must be at least 1 week, got {window}")
+    if not (WEEKLY_DIR / f"{tool_slug(tool)}.npy").exists():
+        # An empty series (header only) replaces any earlier one, so it is
+        # not re-plotted as current and the pipeline sees the stage as done
+        result = pd.DataFrame(columns=RESULT_COLUMNS)
+        OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        result.to_csv(OUTPUT_PATH, index=False)
+        print(f"No stored weekly series for {tool} in {WEEKLY_DIR}; wrote an empty {OUTPUT_PATH}")
+        return result
+
+    matrix, country_codes, weeks = load_weekly(tool_slug(tool))
+    if window > len(weeks):
+        raise SystemExit(f"Window of {window} weeks is longer than the series ({len(weeks)} weeks)")
+
+    if df is None:
+        df = load_table('cleaned', columns=['country_code', indicator])
+    values = df.set_index('country_code')[indicator].astype('float64')
+    log_scale = indicator in LOG_SCALE_COLUMNS
+    if log_scale:
+        values = np.log10(values.where(values > 0))
+
+    result = rolling_correlation(matrix, country_codes, weeks, values, window, min_periods)
+    result.insert(0, 'tool', tool)
+    result.insert(1, 'indicator', f"log10({indicator})" if log_scale else indicator)
+    result['window_weeks'] = window
+
+    print("="*60)
+    print(f"ROLLING CORRELATION: {tool} interest vs {result['indicator'].iloc[0]}")
+    print("="*60)
+    print(f"{matrix.shape[0]} countries x {matrix.shape[1]} weeks, {window}-week windows: {len(result)} windows")
+    valid = result.dropna(subset=['correlation'])
+    if len(valid):
+        print(f"Correlation range: {valid['correlation'].min():+.3f} to {valid['correlation'].max():+.3f}")
+        print(f"Latest window ({valid['week'].iloc[-1]:%Y-%m-%d}): r={valid['correlation'].iloc[-1]:+.3f}, "
+              f"slope={valid['slope'].iloc[-1]:+.3f}")
+
+    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    result.to_csv(OUTPUT_PATH, index=False)
+    print(f"\nRolling series saved: {OUTPUT_PATH}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tool', default='ChatGPT')
+    parser.add_argument('--indicator', default='gdp_per_capita')
+    parser.add_argument('--window', type=int, default=12, help='window length in weeks')
+    parser.add_argument('--min-periods', type=int, default=None,
+                        help='weeks with data a country needs in a window (default: half the window)')
+    args = parser.parse_args()
+    main(tool=args.tool, indicator=args.indicator, window=args.window, min_periods=args.min_periods)
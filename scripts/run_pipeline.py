@@ -0,0 +1,250 @@
+"""
+Pipeline Runner - AI Adoption Project
+
+Runs the project stages (collection, cleaning, analysis, visualization) as
+a DAG in one process and hands the cleaned DataFrame from stage to stage
+in memory. Each stage is keyed by a content hash of its code (the script
+and the local modules it imports) and of its input tables. Any stage whose
+key matches the last successful run, and whose outputs still exist, is
+skipped without importing it.
+
+Usage:
+    python scripts/run_pipeline.py                  # run what changed
+    python scripts/run_pipeline.py --collect        # also re-collect the raw data
+    python scripts/run_pipeline.py --force clustering
+    python scripts/run_pipeline.py --only statistics outliers
+"""
+
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+STATE_FILE = Path("data/processed/.pipeline_state.json")
+VISUALIZATIONS_DIR = Path("visualizations")
+
+
+def table_files(stage):
+    return [Path(f"data/processed/ai_adoption_{stage}{suffix}") for suffix in ('.csv', '.parquet')]
+
+
+class Stage:
+
+    def __init__(self, name, module, deps=(), reads=None, writes=None, outputs=(), manual=False, uses=(),
+                 files=()):
+        self.name = name
+        self.module = module
+        self.deps = list(deps)
+        # Stage tables consumed and produced; the produced frame is kept in
+        # memory for the stages downstream
+        self.reads = reads
+        self.writes = writes
+        # Tables the stage loads from disk itself; they only feed its key
+        self.uses = list(uses)
+        # Other files the stage reads (e.g. stored series); key inputs only
+        self.files = [Path(p) for p in files]
+        self.outputs = [Path(p) for p in outputs]
+        # Manual stages (network collection) only run when asked for
+        self.manual = manual
+
+    def input_files(self):
+        tables = ([self.reads] if self.reads else []) + self.uses
+        return [path for table in tables for path in table_files(table)] + self.files
+
+    def output_files(self):
+        return self.outputs + (table_files(self.writes)[:1] if self.writes else [])
+
+
+STAGES = [
+    Stage('collection', 'data_collection', writes='combined', manual=True),
+    Stage('cleaning', 'data_cleaning', deps=['collection'], reads='combined', writes='cleaned'),
+    Stage('clustering', 'clustering_analysis', deps=['cleaning'], reads='cleaned', writes='clustered',
+          outputs=['visualizations/clustering_elbow.html', 'visualizations/clustering_gdp_vs_ai.html',
+                   'visualizations/clustering_3d.html']),
+    Stage('statistics', 'statistical_analysis', deps=['cleaning', 'clustering'], reads='cleaned',
+          uses=['clustered'],
+          outputs=['visualizations/correlation_heatmap.html', 'visualizations/feature_importance.html',
+                   'data/processed/model_search.csv']),
+    Stage('outliers', 'outlier_analysis', deps=['cleaning'], reads='cleaned',
+          outputs=['visualizations/outliers_scatter.html', 'visualizations/outliers_unexpected_leaders.html']),
+    Stage('rolling_correlation', 'rolling_correlation', deps=['cleaning'], reads='cleaned',
+          files=['data/raw/trends_weekly/chatgpt.npy', 'data/raw/trends_weekly/chatgpt.json'],
+          outputs=['data/processed/rolling_correlation.csv']),
+    Stage('visualization', 'visualization', deps=['cleaning', 'rolling_correlation'], reads='cleaned',
+          files=['data/processed/rolling_correlation.csv'],
+          outputs=['visualizations/world_map_ai_adoption.html', 'visualizations/scatter_gdp_vs_ai.html',
+                   'visualizations/top_15_countries.html'])
+]
+
+
+def local_imports(module, seen=None):
+
+    # The script plus every sibling module it imports, transitively
+    seen = set() if seen is None else seen
+    path = SCRIPTS_DIR / f"{module}.py"
+    if module in seen or not path.exists():
+        return seen
+    seen.add(module)
+
+    tree = ast.parse(path.read_text(encoding='utf-8'))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            local_imports(name.split('.')[0], seen)
+    return seen
+
+
+def file_digest(path, hasher):
+
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(block)
+
+
+def stage_key(stage):
+
+    hasher = hashlib.sha256()
+    for module in sorted(local_imports(stage.module)):
+        hasher.update(module.encode() + b'\0')
+        file_digest(SCRIPTS_DIR / f"{module}.py", hasher)
+    for path in stage.input_files():
+        hasher.update(str(path).encode() + b'\0')
+        if path.exists():
+            file_digest(path, hasher)
+    return hasher.hexdigest()
+
+
+def load_state():
+
+    if not STATE_FILE.exists():
+        return {}
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        return {}
+
+
+def save_state(state):
+
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+
+def run_stage(stage, frames):
+
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    module = importlib.import_module(stage.module)
+
+    if stage.name == 'collection':
+        return module.AIAdoptionCollector().collect_all_data()
+
+    # Shallow copy: with copy-on-write a stage cannot change the frame the
+    # next stage sees, and nothing is copied unless it writes
+    df = frames.get(stage.reads)
+    return module.main(df=None if df is None else df.copy(deep=False))
+
+
+def select_stages(args):
+
+    names = [stage.name for stage in STAGES]
+    for name in (args.only or []) + (args.force or []):
+        if name not in names:
+            raise SystemExit(f"Unknown stage '{name}'. Stages: {', '.join(names)}")
+
+    selected = []
+    for stage in STAGES:
+        if args.only:
+            if stage.name in args.only:
+                selected.append(stage)
+        elif not stage.manual or args.collect:
+            selected.append(stage)
+    return selected
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--collect', action='store_true', help='include the data collection stage')
+    parser.add_argument('--only', nargs='+', metavar='STAGE', help='run only these stages')
+    parser.add_argument('--force', nargs='*', metavar='STAGE',
+                        help='re-run these stages (all selected stages if none given)')
+    args = parser.parse_args()
+
+    start = time.time()
+    stages = select_stages(args)
+    forced = {stage.name for stage in stages} if args.force == [] else set(args.force or [])
+    state = load_state()
+    frames = {}
+    failed = set()
+    summary = []
+    VISUALIZATIONS_DIR.mkdir(exist_ok=True)
+
+    print("="*60)
+    print("AI ADOPTION PIPELINE")
+    print("="*60)
+
+    for stage in stages:
+        if failed.intersection(stage.deps):
+            failed.add(stage.name)
+            summary.append((stage.name, 'blocked', 0.0))
+            continue
+
+        # Keys are computed in order, so a stage sees the tables its
+        # upstream stages have just written
+        key = stage_key(stage)
+        up_to_date = (
+            stage.name not in forced and not stage.manual
+            and state.get(stage.name, {}).get('key') == key
+            and all(path.exists() for path in stage.output_files())
+        )
+        if up_to_date:
+            summary.append((stage.name, 'skipped', 0.0))
+            continue
+
+        print(f"\n>>> {stage.name} ({stage.module}.py)")
+        stage_start = time.time()
+        try:
+            result = run_stage(stage, frames)
+            if stage.writes and result is None:
+                raise RuntimeError(f"no {stage.writes} table produced")
+        except Exception as e:
+            print(f"Stage {stage.name} failed: {e}")
+            failed.add(stage.name)
+            summary.append((stage.name, 'failed', time.time() - stage_start))
+            continue
+
+        if stage.writes:
+            frames[stage.writes] = result
+        state[stage.name] = {'key': key, 'completed_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+        save_state(state)
+        summary.append((stage.name, 'ran', time.time() - stage_start))
+
+    print("\n" + "="*60)
+    print("PIPELINE SUMMARY")
+    print("="*60)
+    for name, status, seconds in summary:
+        print(f"  {name:<20} {status:<8} {seconds:6.1f}s")
+    print(f"\nTotal: {time.time() - start:.2f}s")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Job Scheduler - AI Adoption Project
+
+Runs a graph of collection jobs keyed by (tool, country, source) over a
+shared thread pool. Each source (API) has its own budget: a cap on jobs
+in flight plus the rate limiter its requests go through. Jobs take the
+limiter themselves at the point of a network call, so cache hits do not
+spend rate budget.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class SourceBudget:
+
+    def __init__(self, concurrency=1, limiter=None):
+        # A source that can never start a job would stall the dispatch loop
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        self.concurrency = concurrency
+        self.limiter = limiter
+
+
+class Job:
+
+    def __init__(self, key, fn, deps=()):
+        self.key = key
+        self.fn = fn
+        self.deps = set(deps)
+
+    @property
+    def source(self):
+        return self.key[2]
+
+
+class JobScheduler:
+
+    def __init__(self, budgets):
+        self.budgets = budgets
+        self.jobs = {}
+        self.results = {}
+        self.errors = {}
+
+    def add(self, key, fn, deps=()):
+
+        tool, country, source = key
+        if source not in self.budgets:
+            raise ValueError(f"No budget configured for source '{source}'")
+        self.jobs[key] = Job(key, fn, deps)
+
+    def run(self, progress_every=25):
+
+        waiting = dict(self.jobs)
+        ready = {source: [] for source in self.budgets}
+        running = {source: 0 for source in self.budgets}
+        done = {source: 0 for source in self.budgets}
+        totals = {source: 0 for source in self.budgets}
+        for job in waiting.values():
+            totals[job.source] += 1
+
+        def release():
+            for key in list(waiting):
+                job = waiting[key]
+                if job.deps & self.errors.keys():
+                    self.errors[key] = RuntimeError("Skipped, dependency failed")
+                    del waiting[key]
+                elif job.deps <= self.results.keys():
+                    ready[job.source].append(job)
+                    del waiting[key]
+
+        start = time.time()
+        pool_size = sum(budget.concurrency for budget in self.budgets.values())
+        futures = {}
+
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            release()
+            while futures or any(ready.values()):
+                for source, queue in ready.items():
+                    while queue and running[source] < self.budgets[source].concurrency:
+                        job = queue.pop(0)
+                        running[source] += 1
+                        futures[pool.submit(job.fn)] = job
+
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = futures.pop(future)
+                    running[job.source] -= 1
+                    done[job.source] += 1
+                    try:
+                        self.results[job.key] = future.result()
+                    except Exception as e:
+                        self.errors[job.key] = e
+                        print(f"  {job.key}: Error - {str(e)}")
+
+                    if done[job.source] % progress_every == 0:
+                        print(f"  [{job.source}] {done[job.source]}/{totals[job.source]} jobs "
+                              f"({time.time() - start:.0f}s)")
+                release()
+
+        for key in waiting:
+            self.errors[key] = RuntimeError("Never ran, unknown dependency")
+
+        for source, budget in self.budgets.items():
+            line = f"  [{source}] {done[source]}/{totals[source]} jobs"
+            if budget.limiter is not None:
+                line += (f", {budget.limiter.throttles} throttled, "
+                         f"rate now {budget.limiter.rate:.2f}/s")
+            print(line)
+
+        return self.results
@@ -0,0 +1,138 @@
+"""
+Silhouette - AI Adoption Project
+
+Silhouette scores for many candidate clusterings of the same points. Up
+to a configurable size, the pairwise distances are computed once as a
+condensed float32 matrix: n(n-1)/2 values, a quarter of the memory of a
+float64 square matrix. One pass over its rows then scores every k
+together: each row block is multiplied by the stacked one-hot label
+matrices. Above that size no distance matrix is kept. Each labelling is
+scored on a stratified sample of points (by cluster), each measured
+against all points, and the result carries a standard error.
+"""
+
+import numpy as np
+
+MAX_EXACT = 4000
+SAMPLE_SIZE = 2000
+
+
+def condensed_distances(X, block_rows=256):
+
+    # Euclidean distances for i < j in scipy's pdist order, built in row
+    # blocks straight into a float32 buffer (no float64 n x n temporary)
+    X = np.asarray(X, dtype=np.float64)
+    n = len(X)
+    D = np.empty(n * (n - 1) // 2, dtype=np.float32)
+    sq = (X ** 2).sum(axis=1)
+    for start in range(0, n - 1, block_rows):
+        rows = np.arange(start, min(start + block_rows, n - 1))
+        d2 = sq[rows, None] + sq[None, :] - 2 * X[rows] @ X.T
+        d = np.sqrt(np.maximum(d2, 0))
+        for offset, i in enumerate(rows):
+            begin = n * i - i * (i + 1) // 2
+            D[begin:begin + n - i - 1] = d[offset, i + 1:]
+    return D
+
+
+def square_rows(D, n, rows):
+
+    # Full distance rows (len(rows) x n) gathered from the condensed matrix
+    i = np.asarray(rows)[:, None]
+    j = np.arange(n)[None, :]
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+    index = n * lo - lo * (lo + 1) // 2 + (hi - lo - 1)
+    out = D[np.where(lo == hi, 0, index)]
+    out[lo == hi] = 0
+    return out
+
+
+def _one_hot(labels):
+
+    codes, labels = np.unique(labels, return_inverse=True)
+    H = np.zeros((len(labels), len(codes)), dtype=np.float32)
+    H[np.arange(len(labels)), labels] = 1
+    return H, labels
+
+
+def _point_silhouettes(sums, own, counts):
+
+    # sums: (points, clusters) total distance to each cluster. As in
+    # sklearn, points alone in their cluster score 0
+    rows = np.arange(len(own))
+    own_count = counts[own]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = sums[rows, own] / (own_count - 1)
+        mean_other = sums / counts
+        mean_other[rows, own] = np.inf
+        b = mean_other.min(axis=1)
+        s = (b - a) / np.maximum(a, b)
+    s[own_count <= 1] = 0
+    return np.nan_to_num(s)
+
+
+def exact_silhouettes(D, n, labelings, block_rows=512):
+
+    # labelings: {key: labels}. Every key is scored in the same pass
+    one_hots = {key: _one_hot(labels) for key, labels in labelings.items()}
+    H = np.hstack([h for h, _ in one_hots.values()])
+    bounds = np.cumsum([0] + [h.shape[1] for h, _ in one_hots.values()])
+
+    totals = dict.fromkeys(labelings, 0.0)
+    for start in range(0, n, block_rows):
+        rows = np.arange(start, min(start + block_rows, n))
+        sums = square_rows(D, n, rows) @ H
+        for (key, (h, labels)), lo, hi in zip(one_hots.items(), bounds[:-1], bounds[1:]):
+            totals[key] += _point_silhouettes(sums[:, lo:hi].astype(np.float64), labels[rows],
+                                              h.sum(axis=0).astype(np.float64)).sum()
+    return {key: {'silhouette': total / n, 'silhouette_se': 0.0, 'silhouette_sampled': False}
+            for key, total in totals.items()}
+
+
+def sampled_silhouette(X, labels, sample_size=SAMPLE_SIZE, seed=0, block_rows=512):
+
+    # Stratified by cluster: each cluster contributes in proportion to its
+    # size (at least two points), and each sampled point is scored against
+    # every point. The estimate reweights the strata to their true sizes
+    X = np.asarray(X, dtype=np.float64)
+    H, codes = _one_hot(labels)
+    counts = H.sum(axis=0).astype(np.float64)
+    n = len(X)
+    rng = np.random.default_rng(seed)
+
+    sample, strata = [], []
+    for c, size in enumerate(counts):
+        members = np.flatnonzero(codes == c)
+        take = int(min(size, max(2, round(sample_size * size / n))))
+        sample.append(rng.choice(members, take, replace=False))
+        strata.append(np.full(take, c))
+    sample, strata = np.concatenate(sample), np.concatenate(strata)
+
+    sq = (X ** 2).sum(axis=1)
+    scores = np.empty(len(sample))
+    for start in range(0, len(sample), block_rows):
+        rows = sample[start:start + block_rows]
+        d = np.sqrt(np.maximum(sq[rows, None] + sq[None, :] - 2 * X[rows] @ X.T, 0))
+        d[np.arange(len(rows)), rows] = 0
+        scores[start:start + len(rows)] = _point_silhouettes((d @ H).astype(np.float64), codes[rows], counts)
+
+    weights = counts / n
+    means = np.array([scores[strata == c].mean() for c in range(len(counts))])
+    variances = np.array([scores[strata == c].var(ddof=1) if (strata == c).sum() > 1 else 0.0
+                          for c in range(len(counts))])
+    taken = np.bincount(strata, minlength=len(counts))
+    # Finite population correction: a fully sampled cluster adds no error
+    se = np.sqrt((weights ** 2 * variances / taken * (1 - taken / counts)).sum())
+    return {'silhouette': float((weights * means).sum()), 'silhouette_se': float(se),
+            'silhouette_sampled': True}
+
+
+def silhouette_scores(X, labelings, max_exact=MAX_EXACT, sample_size=SAMPLE_SIZE, seed=0):
+
+    # {key: labels} -> {key: {'silhouette', 'silhouette_se', 'silhouette_sampled'}}
+    if not labelings:
+        return {}
+    n = len(X)
+    if n <= max_exact:
+        return exact_silhouettes(condensed_distances(X), n, labelings)
+    return {key: sampled_silhouette(X, labels, sample_size, seed) for key, labels in labelings.items()}
@@ -0,0 +1,113 @@
+"""
+Streaming Sketches - AI Adoption Project
+
+Mergeable summaries for passes over data that does not fit in memory.
+QuantileSketch is a KLL sketch: a stack of compactors, each holding items
+of weight 2^level, that answers rank and quantile queries within about
+1.7/k of the true rank in O(k) memory. Sketches built over separate
+chunks (or processes) merge into one. Until the first compaction the
+sketch keeps every value, so small inputs get exact answers.
+"""
+
+import numpy as np
+
+
+class QuantileSketch:
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.count = 0
+        self.compactors = [np.empty(0)]
+        self.random = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller buffers (c = 2/3)
+        depth = len(self.compactors) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _size(self):
+        return sum(len(items) for items in self.compactors)
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def update(self, values):
+
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate([self.compactors[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+
+        while self._size() > self._max_size():
+            for level in range(len(self.compactors)):
+                items = self.compactors[level]
+                if len(items) < self._capacity(level):
+                    continue
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+
+                # Keep every other item of the sorted buffer (random phase)
+                # at double weight; an odd leftover stays at this level
+                items = np.sort(items)
+                keep = len(items) % 2
+                promoted = items[keep:][self.random.integers(2)::2]
+                self.compactors[level] = items[:keep]
+                self.compactors[level + 1] = np.concatenate([self.compactors[level + 1], promoted])
+                break
+
+    def _weighted(self):
+
+        values = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(len(items), 2 ** level, dtype=np.int64)
+                                  for level, items in enumerate(self.compactors)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+
+        if self.count == 0:
+            return np.nan
+        if len(self.compactors) == 1:
+            # Nothing compacted yet: exact, interpolated like pandas
+            return float(np.quantile(self.compactors[0], q))
+        values, cumulative = self._weighted()
+        target = q * cumulative[-1]
+        return float(values[min(np.searchsorted(cumulative, target), len(values) - 1)])
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def rank(self, value):
+
+        if self.count == 0:
+            return 0.0
+        values, cumulative = self._weighted()
+        position = np.searchsorted(values, value, side='right')
+        return float(cumulative[position - 1] / cumulative[-1]) if position else 0.0
+
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count,
+                'compactors': [items.tolist() for items in self.compactors]}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(k=state['k'])
+        sketch.count = state['count']
+        sketch.compactors = [np.asarray(items, dtype=np.float64) for items in state['compactors']]
+        return sketch
@@ -12,19 +12,34 @@ from scipy import stats
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 from pathlib import Path
+
+from correlation import CorrelationEngine
+from group_tests import GROUP_COLUMNS, group_tests
+from inference import InferenceEngine
+import model_search
+from spatial import knn_weights, local_moran, morans_i, spatial_frame
+from storage import load_table
 import plotly.express as px
 import plotly.graph_objects as go
 
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 8)
 
+ANALYSIS_COLUMNS = ['country_id', 'country_code', 'country_name', 'avg_interest',
+                    'gdp_per_capita', 'tertiary_education', 'internet_users_pct', 'population',
+                    'ai_adoption_score', 'economic_category', 'region', 'continent',
+                    'country_code_iso3']
+
+N_RESAMPLES = 10000
+SPATIAL_NEIGHBORS = 6
+
 def load_data():
     
-    df = pd.read_csv('data/processed/ai_adoption_cleaned.csv')
+    df = load_table('cleaned', columns=ANALYSIS_COLUMNS)
     print(f"Loaded {len(df)} countries\n")
     return df
 
-def correlation_analysis(df):
+def correlation_analysis(df, engine=None, correlations=None):
     
     print("="*80)
     print("CORRELATION ANALYSIS")
@@ -34,16 +49,26 @@ def correlation_analysis(df):
                     'internet_users_pct', 'population', 'ai_adoption_score']
     
     available_cols = [col for col in numeric_cols if col in df.columns]
-    corr_df = df[available_cols].corr()
+    correlations = correlations or CorrelationEngine()
+    corr_df = correlations.matrices(df[available_cols], methods=('pearson',))['pearson']
     
     print("\nPearson Correlation Matrix:")
     print(corr_df.round(3))
     
-    print("\nStrongest correlations with avg_interest:")
-    ai_corr = corr_df['avg_interest'].sort_values(ascending=False)
-    for col, val in ai_corr.items():
-        if col != 'avg_interest':
-            print(f"  {col:25s}: {val:+.3f}")
+    print("\nStrongest correlations with avg_interest (pairwise complete):")
+    ai_corr = correlations.against(df[available_cols], 'avg_interest')
+    print(f"  {'':25s}  {'pearson':>8s}  {'spearman':>8s}  {'kendall':>8s}  {'n':>5s}")
+    for col, row in ai_corr.iterrows():
+        print(f"  {col:25s}: {row['pearson']:+8.3f}  {row['spearman']:+8.3f}  {row['kendall']:+8.3f}  {int(row['n']):5d}")
+    
+    engine = engine or InferenceEngine(n_resamples=N_RESAMPLES)
+    inference = engine.correlations(df[available_cols])
+    ci = f"{engine.confidence:.0%} CI"
+    print(f"\nBootstrap {ci} and permutation p-values ({engine.n_resamples:,} resamples, "
+          f"complete cases):")
+    for _, row in inference.iterrows():
+        print(f"  {row['var1']:18s} ~ {row['var2']:18s}: {row['r']:+.3f} "
+              f"[{row['ci_low']:+.3f}, {row['ci_high']:+.3f}]  p={row['p_perm']:.4f}")
     
     fig = px.imshow(corr_df, 
                     text_auto='.2f',
@@ -58,9 +83,9 @@ def correlation_analysis(df):
     fig.write_html(output_path)
     print(f"\nHeatmap saved: {output_path}")
     
-    return corr_df
+    return corr_df, inference
 
-def regression_analysis(df):
+def regression_analysis(df, engine=None):
     
     print("\n" + "="*80)
     print("REGRESSION ANALYSIS")
@@ -83,8 +108,12 @@ def regression_analysis(df):
     y_pred = model.predict(X_scaled)
     r2 = model.score(X_scaled, y)
     
+    engine = engine or InferenceEngine(n_resamples=N_RESAMPLES)
+    inference, (_, r2_low, r2_high) = engine.coefficients(X, y)
+    inference = inference.set_index('feature')
+    
     print(f"\nModel Performance:")
-    print(f"  R² Score: {r2:.4f}")
+    print(f"  R² Score: {r2:.4f} ({engine.confidence:.0%} CI [{r2_low:.4f}, {r2_high:.4f}])")
     print(f"  Intercept: {model.intercept_:.4f}")
     
     print(f"\nFeature Coefficients (Standardized):")
@@ -95,7 +124,9 @@ def regression_analysis(df):
     }).sort_values('Abs_Coef', ascending=False)
     
     for _, row in coef_df.iterrows():
-        print(f"  {row['Feature']:25s}: {row['Coefficient']:+.4f}")
+        ci = inference.loc[row['Feature']]
+        print(f"  {row['Feature']:25s}: {row['Coefficient']:+.4f} "
+              f"[{ci['ci_low']:+.4f}, {ci['ci_high']:+.4f}]  p={ci['p_perm']:.4f}")
     
     fig = px.bar(coef_df, 
                  x='Coefficient', 
@@ -113,55 +144,112 @@ def regression_analysis(df):
     fig.write_html(output_path)
     print(f"\nFeature importance plot saved: {output_path}")
     
-    return model, r2
+    residuals = pd.Series(y - y_pred, index=df_reg.index, name='residual')
+    
+    # Every subset of these features, with and without interactions, on all
+    # countries and per region/continent, ranked by BIC
+    print()
+    search_table, n_specs = model_search.search(df, feature_cols, target='avg_interest')
+    if len(search_table):
+        model_search.report(search_table, n_specs, top=5)
+    
+    return model, r2, residuals
 
-def anova_test(df):
+def spatial_analysis(df, residuals=None, k=SPATIAL_NEIGHBORS):
     
     print("\n" + "="*80)
-    print("ANOVA TEST - Economic Categories")
+    print(f"SPATIAL AUTOCORRELATION - Moran's I ({k} nearest neighbours)")
     print("="*80)
     
-    if 'economic_category' not in df.columns:
-        print("Economic category column not found")
-        return
-    
-    df_anova = df[['economic_category', 'avg_interest']].dropna()
-    
-    groups = []
-    categories = df_anova['economic_category'].unique()
+    if 'country_code_iso3' not in df.columns:
+        print("country_code_iso3 column not found")
+        return None
+    
+    data = df.assign(residual=residuals) if residuals is not None else df
+    results = {}
+    for col in ['avg_interest', 'residual']:
+        if col not in data.columns:
+            continue
+        frame = spatial_frame(data, [col])
+        W = knn_weights(frame['latitude'].to_numpy(), frame['longitude'].to_numpy(), k)
+        global_i = morans_i(frame[col].to_numpy(), W, permutations=N_RESAMPLES)
+        lisa = local_moran(frame[col].to_numpy(), W, permutations=N_RESAMPLES)
+        lisa.index = frame.index
+        results[col] = (global_i, lisa)
+        
+        label = 'regression residuals' if col == 'residual' else col
+        print(f"\n{label} (n={global_i['n']}):")
+        print(f"  Moran's I: {global_i['I']:+.4f} (E[I] = {global_i['expected_I']:+.4f}, "
+              f"z = {global_i['z_sim']:.2f}, p = {global_i['p_sim']:.4f})")
+        
+        significant = lisa[lisa['significant']]
+        print(f"  Local clusters (LISA p < 0.05): {len(significant)} of {len(lisa)} countries")
+        names = df.loc[significant.index, 'country_name'] if 'country_name' in df.columns else significant.index
+        for quadrant in ['HH', 'LL', 'HL', 'LH']:
+            members = names[significant['quadrant'] == quadrant]
+            if len(members):
+                print(f"    {quadrant}: {', '.join(members.astype(str))}")
+    
+    return results
+
+def attach_clusters(df):
+    
+    # Cluster labels come from the clustering stage, when it has run. Both
+    # tables carry the registry's integer country_id, so that is the key
+    key = 'country_id' if 'country_id' in df.columns else 'country_code'
+    try:
+        clusters = load_table('clustered', columns=[key, 'cluster_name'])
+    except FileNotFoundError:
+        return df
+    if key not in clusters.columns:
+        return df
+    return df.merge(clusters, on=key, how='left')
+
+def anova_test(df):
     
-    for category in categories:
-        group_data = df_anova[df_anova['economic_category'] == category]['avg_interest']
-        groups.append(group_data)
+    print("\n" + "="*80)
+    print("GROUP TESTS - avg_interest by " + ", ".join(c for c in GROUP_COLUMNS if c in df.columns))
+    print("="*80)
     
-    f_stat, p_value = stats.f_oneway(*groups)
+    table, pairs, summaries = group_tests(df, 'avg_interest', GROUP_COLUMNS)
+    if table.empty:
+        print("No grouping column with at least two groups found")
+        return table, pairs
     
-    print(f"\nF-statistic: {f_stat:.4f}")
-    print(f"P-value: {p_value:.6f}")
+    print("\nOmnibus tests (ANOVA, Welch, Kruskal-Wallis):")
+    print(table[['groups', 'n', 'anova_f', 'anova_p', 'welch_p', 'kruskal_p', 'eta_squared']].round(4).to_string())
     
-    if p_value < 0.05:
-        print("\nResult: Significant difference between economic categories (p < 0.05)")
-    else:
-        print("\nResult: No significant difference between categories (p >= 0.05)")
+    for col, row in table.iterrows():
+        if row['anova_p'] < 0.05:
+            print(f"\n{col}: significant difference between groups (ANOVA p < 0.05)")
+        else:
+            print(f"\n{col}: no significant difference between groups (ANOVA p >= 0.05)")
+        for group, stats_row in summaries[col].iterrows():
+            print(f"  {str(group):25s}: {stats_row['mean']:.2f} (n={int(stats_row['n'])})")
     
-    print("\nCategory Means:")
-    for category in categories:
-        mean_val = df_anova[df_anova['economic_category'] == category]['avg_interest'].mean()
-        count = len(df_anova[df_anova['economic_category'] == category])
-        print(f"  {category:15s}: {mean_val:.2f} (n={count})")
+    significant = pairs[(pairs['tukey_p'] < 0.05) | (pairs['games_howell_p'] < 0.05)]
+    print(f"\nPost-hoc pairs significant under Tukey HSD or Games-Howell: {len(significant)} of {len(pairs)}")
+    if len(significant):
+        print(significant.round(4).to_string(index=False))
     
-    return f_stat, p_value
+    return table, pairs
 
-def main():
+def main(df=None):
     
-    df = load_data()
+    if df is None:
+        df = load_data()
+    df = attach_clusters(df)
     
-    corr_df = correlation_analysis(df)
+    engine = InferenceEngine(n_resamples=N_RESAMPLES)
     
-    model, r2 = regression_analysis(df)
+    corr_df, corr_inference = correlation_analysis(df, engine)
+    
+    model, r2, residuals = regression_analysis(df, engine)
     
     anova_test(df)
     
+    spatial_analysis(df, residuals)
+    
     print("\n" + "="*80)
     print("STATISTICAL ANALYSIS COMPLETE")
     print("="*80)
@@ -0,0 +1,231 @@
+"""
+Storage - AI Adoption Project
+
+Typed columnar storage for the hand-off between pipeline stages. Each
+stage table (combined, cleaned, clustered) is written as Parquet with an
+explicit schema. Region, continent and category columns are stored as
+categoricals and numbers as fixed-width types. Readers can load just the
+columns they need. The CSVs are still written next to the Parquet files
+for the notebooks and docs; if pyarrow is missing, everything falls back
+to them.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+DATA_DIR = Path("data/processed")
+
+ECONOMIC_CATEGORIES = pd.CategoricalDtype(['Developing', 'Emerging', 'Developed'], ordered=True)
+
+# One schema shared by every stage; each table uses the columns it has
+COLUMN_TYPES = {
+    'country_id': 'Int16',
+    'country_code': 'string',
+    'country_name': 'string',
+    'country_code_iso3': 'string',
+    'region': 'category',
+    'continent': 'category',
+    'economic_category': ECONOMIC_CATEGORIES,
+    'trend_direction': pd.CategoricalDtype(['falling', 'rising']),
+    'cluster_name': 'category',
+    'cluster': 'int8',
+    'avg_interest': 'float64',
+    'max_interest': 'Int16',
+    'current_interest': 'Int16',
+    'gdp_per_capita': 'float64',
+    'tertiary_education': 'float64',
+    'internet_users_pct': 'float64',
+    'population': 'float64',
+    'ai_adoption_score': 'float64',
+    'gdp_per_capita_imputed': 'bool',
+    'tertiary_education_imputed': 'bool',
+    'internet_users_pct_imputed': 'bool',
+    'population_imputed': 'bool'
+}
+
+# Only empty fields are missing: 'NA' is Namibia's ISO2 code
+CSV_NA = {'keep_default_na': False, 'na_values': ['']}
+
+
+def table_path(stage, suffix='.parquet'):
+    return DATA_DIR / f"ai_adoption_{stage}{suffix}"
+
+
+def apply_schema(df):
+
+    types = {col: dtype for col, dtype in COLUMN_TYPES.items() if col in df.columns}
+    return df.astype(types)
+
+
+def save_table(df, stage):
+
+    df = apply_schema(df)
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    csv_path = table_path(stage, '.csv')
+    df.to_csv(csv_path, index=False)
+
+    if HAS_PYARROW:
+        path = table_path(stage)
+        df.to_parquet(path, index=False)
+        return path
+    return csv_path
+
+
+def append_table(df, stage):
+
+    csv_path = table_path(stage, '.csv')
+    if not csv_path.exists():
+        return save_table(df, stage)
+
+    with open(csv_path, encoding='utf-8') as f:
+        header = pd.read_csv(f, nrows=0).columns
+    extra = set(df.columns) - set(header)
+    if extra:
+        raise ValueError(f"Cannot append to {csv_path}: unknown columns {sorted(extra)}")
+
+    apply_schema(df).reindex(columns=header).to_csv(csv_path, mode='a', header=False, index=False)
+
+    # Parquet files cannot be appended to, so the stale copy is dropped and
+    # readers use the CSV until the next full save
+    table_path(stage).unlink(missing_ok=True)
+    return csv_path
+
+
+def load_table(stage, columns=None):
+
+    path = table_path(stage)
+    csv_path = table_path(stage, '.csv')
+
+    # Prefer Parquet unless the CSV was rewritten after it (e.g. by hand).
+    # Requested columns that the table lacks are skipped, as with usecols.
+    if HAS_PYARROW and path.exists() and (
+            not csv_path.exists() or path.stat().st_mtime >= csv_path.stat().st_mtime):
+        if columns is not None:
+            available = _parquet_columns(path)
+            columns = [col for col in columns if col in available]
+        return pd.read_parquet(path, columns=columns)
+
+    if not csv_path.exists():
+        raise FileNotFoundError(f"No {stage} table found in {DATA_DIR}")
+
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda col: col in wanted
+    return apply_schema(pd.read_csv(csv_path, usecols=usecols, **CSV_NA))
+
+
+def _parquet_columns(path):
+
+    import pyarrow.parquet as pq
+    return set(pq.read_schema(path).names)
+
+
+def iter_table(stage, chunksize, columns=None):
+
+    path = table_path(stage)
+    csv_path = table_path(stage, '.csv')
+
+    # Same source choice as load_table, but in bounded chunks
+    if HAS_PYARROW and path.exists() and (
+            not csv_path.exists() or path.stat().st_mtime >= csv_path.stat().st_mtime):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        if columns is not None:
+            columns = [col for col in columns if col in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield apply_schema(batch.to_pandas())
+        return
+
+    if not csv_path.exists():
+        raise FileNotFoundError(f"No {stage} table found in {DATA_DIR}")
+
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda col: col in wanted
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize, **CSV_NA):
+        yield apply_schema(chunk)
+
+
+class TableWriter:
+
+    # Appends chunks to a stage's CSV and Parquet files as they arrive.
+    # Files are written under a temporary name and renamed on close, so
+    # readers never see a half-written table
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.rows = 0
+        self.path = None
+        self._csv = None
+        self._parquet = None
+        self._schema = None
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    def _tmp(self, path):
+        return path.with_name(path.name + '.tmp')
+
+    def write(self, df):
+
+        df = apply_schema(df)
+        if self._csv is None:
+            self._csv = open(self._tmp(table_path(self.stage, '.csv')), 'w', newline='', encoding='utf-8')
+            df.to_csv(self._csv, index=False)
+        else:
+            df.to_csv(self._csv, index=False, header=False)
+
+        if HAS_PYARROW:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._schema = table.schema
+                self._parquet = pq.ParquetWriter(self._tmp(table_path(self.stage)), self._schema)
+            else:
+                # Chunks can infer different categories; keep the first schema
+                table = table.cast(self._schema)
+            self._parquet.write_table(table)
+
+        self.rows += len(df)
+
+    def close(self):
+
+        if self._csv is not None:
+            self._csv.close()
+            csv_path = table_path(self.stage, '.csv')
+            self._tmp(csv_path).replace(csv_path)
+            self.path = csv_path
+        if self._parquet is not None:
+            self._parquet.close()
+            path = table_path(self.stage)
+            self._tmp(path).replace(path)
+            self.path = path
+        self._csv = self._parquet = None
+        return self.path
+
+    def abort(self):
+
+        for handle, path in ((self._csv, table_path(self.stage, '.csv')),
+                             (self._parquet, table_path(self.stage))):
+            if handle is not None:
+                handle.close()
+                self._tmp(path).unlink(missing_ok=True)
+        self._csv = self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,174 @@
+"""
+Trends Features - AI Adoption Project
+
+Keeps the raw weekly Google Trends series as a float32 country x week
+array (.npy plus a small JSON index, readable memory-mapped) and derives
+every trend feature from it in one vectorized NumPy pass. New features
+can then be added without collecting again.
+
+Usage:
+    python scripts/trends_features.py       # rebuild trends_all_tools.csv from stored series
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+WEEKLY_DIR = Path("data/raw/trends_weekly")
+
+
+def series_matrix(series_by_country, country_codes):
+
+    # Align every country on the union of weeks; missing weeks stay NaN
+    weeks = sorted({week for series in series_by_country.values() for week in series})
+    week_pos = {week: i for i, week in enumerate(weeks)}
+
+    matrix = np.full((len(country_codes), len(weeks)), np.nan, dtype=np.float32)
+    for row, country_code in enumerate(country_codes):
+        series = series_by_country.get(country_code)
+        if series:
+            cols = [week_pos[week] for week in series]
+            matrix[row, cols] = list(series.values())
+
+    return matrix, weeks
+
+
+def save_weekly(name, matrix, country_codes, weeks, weekly_dir=WEEKLY_DIR):
+
+    weekly_dir = Path(weekly_dir)
+    weekly_dir.mkdir(parents=True, exist_ok=True)
+    np.save(weekly_dir / f"{name}.npy", matrix.astype(np.float32, copy=False))
+    with open(weekly_dir / f"{name}.json", 'w') as f:
+        json.dump({'countries': list(country_codes), 'weeks': [str(week) for week in weeks]}, f)
+
+
+def load_weekly(name, weekly_dir=WEEKLY_DIR, mmap=True):
+
+    weekly_dir = Path(weekly_dir)
+    matrix = np.load(weekly_dir / f"{name}.npy", mmap_mode='r' if mmap else None)
+    with open(weekly_dir / f"{name}.json") as f:
+        index = json.load(f)
+    return matrix, index['countries'], pd.to_datetime(index['weeks'])
+
+
+def trend_features(matrix):
+
+    values = np.asarray(matrix, dtype=np.float64)
+    valid = ~np.isnan(values)
+    n_weeks = values.shape[1]
+    n = valid.sum(axis=1)
+    has_data = n > 0
+    safe_n = np.maximum(n, 1)
+    filled = np.where(valid, values, 0.0)
+
+    # Position of each observation within its own series, so gaps do not
+    # shift the first-half / second-half split
+    pos = np.cumsum(valid, axis=1) - 1
+    first = valid & (pos < (n // 2)[:, None])
+    second = valid & ~first
+    first_half = (filled * first).sum(axis=1) / np.maximum(first.sum(axis=1), 1)
+    second_half = (filled * second).sum(axis=1) / np.maximum(second.sum(axis=1), 1)
+    first_half[first.sum(axis=1) == 0] = np.nan
+
+    avg = filled.sum(axis=1) / safe_n
+    peak = np.argmax(np.where(valid, values, -np.inf), axis=1)
+    last = n_weeks - 1 - np.argmax(valid[:, ::-1], axis=1)
+
+    # Least-squares slope of interest against week number (points per week)
+    t = np.arange(n_weeks, dtype=np.float64)
+    t_mean = (valid * t).sum(axis=1) / safe_n
+    dt = np.where(valid, t - t_mean[:, None], 0.0)
+    dy = np.where(valid, values - avg[:, None], 0.0)
+    denom = (dt ** 2).sum(axis=1)
+    slope = np.divide((dt * dy).sum(axis=1), denom, out=np.full(len(values), np.nan),
+                      where=denom > 0)
+
+    # Volatility: standard deviation of week-over-week changes
+    diffs = np.diff(values, axis=1)
+    diff_valid = ~np.isnan(diffs)
+    n_diff = diff_valid.sum(axis=1)
+    diffs = np.where(diff_valid, diffs, 0.0)
+    diff_mean = diffs.sum(axis=1) / np.maximum(n_diff, 1)
+    volatility = np.sqrt(
+        (np.where(diff_valid, diffs - diff_mean[:, None], 0.0) ** 2).sum(axis=1) / np.maximum(n_diff, 1)
+    )
+    volatility[n_diff == 0] = np.nan
+
+    rows = np.arange(len(values))
+    return {
+        'has_data': has_data,
+        'avg_interest': np.where(has_data, avg, np.nan),
+        'max_interest': np.where(has_data, values[rows, peak], np.nan),
+        'current_interest': np.where(has_data, values[rows, last], np.nan),
+        'trend_direction': np.where(second_half > first_half, 'rising', 'falling'),
+        'trend_magnitude': np.abs(second_half - first_half) / (first_half + 1) * 100,
+        'data_points': n,
+        'trend_slope': slope,
+        'volatility': volatility,
+        'peak_week': peak
+    }
+
+
+def feature_frame(matrix, country_codes, weeks, country_names, tool_name):
+
+    features = trend_features(matrix)
+    keep = features['has_data']
+    weeks = pd.DatetimeIndex(weeks)
+
+    return pd.DataFrame({
+        'country_code': np.asarray(country_codes)[keep],
+        'country_name': [country_names.get(code, code) for code in np.asarray(country_codes)[keep]],
+        'tool': tool_name,
+        'avg_interest': features['avg_interest'][keep].round(2),
+        'max_interest': features['max_interest'][keep].astype(int),
+        'current_interest': features['current_interest'][keep].astype(int),
+        'trend_direction': features['trend_direction'][keep],
+        'trend_magnitude': features['trend_magnitude'][keep].round(2),
+        'data_points': features['data_points'][keep],
+        'trend_slope': features['trend_slope'][keep].round(4),
+        'volatility': features['volatility'][keep].round(2),
+        'peak_week': weeks[features['peak_week'][keep]].strftime('%Y-%m-%d')
+    })
+
+
+def tool_slug(tool_name):
+    return tool_name.lower().replace(' ', '_')
+
+
+def weekly_name(keywords, tool_name):
+
+    # Multi-term payloads are scaled jointly, so keep them apart from the
+    # single-keyword series
+    if len(keywords) == 1:
+        return tool_slug(tool_name)
+    return f"{'+'.join(tool_slug(k) for k in keywords)}__{tool_slug(tool_name)}"
+
+
+def main():
+
+    from data_collection import AIAdoptionCollector
+
+    collector = AIAdoptionCollector(offline=True)
+    frames = []
+    for tool_name in collector.ai_tools:
+        path = WEEKLY_DIR / f"{tool_slug(tool_name)}.npy"
+        if not path.exists():
+            print(f"  {tool_name}: no stored series ({path})")
+            continue
+        matrix, country_codes, weeks = load_weekly(tool_slug(tool_name))
+        frames.append(feature_frame(matrix, country_codes, weeks, collector.countries, tool_name))
+        print(f"  {tool_name}: {matrix.shape[0]} countries x {matrix.shape[1]} weeks")
+
+    if not frames:
+        return
+
+    df = pd.concat(frames, ignore_index=True)
+    output_file = collector.data_dir / "trends_all_tools.csv"
+    df.to_csv(output_file, index=False)
+    print(f"\nRebuilt {len(df)} tool/country records in {output_file}")
+
+
+if __name__ == "__main__":
+    main()
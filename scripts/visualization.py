@@ -7,12 +7,25 @@ Creates interactive maps and charts.
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 from pathlib import Path
 
+from storage import load_table
+
+VISUALIZATION_COLUMNS = ['country_code_iso3', 'country_name', 'avg_interest', 'gdp_per_capita',
+                         'internet_users_pct', 'population', 'economic_category']
+
+ROLLING_PATH = Path("data/processed/rolling_correlation.csv")
+
 class AIAdoptionVisualizer:
     
-    def __init__(self, data_path="data/processed/ai_adoption_cleaned.csv"):
-        self.df = pd.read_csv(data_path)
+    def __init__(self, data_path=None, df=None):
+        if df is not None:
+            self.df = df
+        elif data_path is None:
+            self.df = load_table('cleaned', columns=VISUALIZATION_COLUMNS)
+        else:
+            self.df = pd.read_csv(data_path)
         self.output_dir = Path("visualizations")
         self.output_dir.mkdir(exist_ok=True)
         print(f"Loaded {len(self.df)} records")
@@ -109,6 +122,45 @@ class AIAdoptionVisualizer:
         
         return fig
     
+    def create_rolling_correlation_chart(self, rolling=None):
+        
+        print("\nGenerating rolling correlation chart...")
+        
+        if rolling is None:
+            if not ROLLING_PATH.exists():
+                print(f"No rolling series found ({ROLLING_PATH}); run rolling_correlation.py first")
+                return None
+            rolling = pd.read_csv(ROLLING_PATH, parse_dates=['week'])
+        
+        output_file = self.output_dir / "rolling_correlation.html"
+        if rolling.empty:
+            # No weekly series was stored; drop any chart of an older one
+            output_file.unlink(missing_ok=True)
+            print(f"Rolling series is empty ({ROLLING_PATH}); chart skipped")
+            return None
+        
+        tool, indicator = rolling['tool'].iloc[0], rolling['indicator'].iloc[0]
+        
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+                            subplot_titles=('Cross-country correlation', 'Regression slope'))
+        fig.add_trace(go.Scatter(x=rolling['week'], y=rolling['correlation'], mode='lines',
+                                 name='Correlation'), row=1, col=1)
+        fig.add_trace(go.Scatter(x=rolling['week'], y=rolling['slope'], mode='lines',
+                                 name='Slope'), row=2, col=1)
+        fig.add_hline(y=0, line_dash='dot', line_color='gray', row=1, col=1)
+        
+        fig.update_yaxes(title_text='Pearson r', range=[-1, 1], row=1, col=1)
+        fig.update_yaxes(title_text='Interest points per unit', row=2, col=1)
+        fig.update_layout(
+            title=f'{tool} Interest vs {indicator} ({rolling["window_weeks"].iloc[0]}-week rolling window)',
+            height=700, showlegend=False
+        )
+        
+        fig.write_html(str(output_file))
+        print(f"Chart saved: {output_file}")
+        
+        return fig
+    
     def create_all_visualizations(self):
         
         print("="*60)
@@ -118,16 +170,19 @@ class AIAdoptionVisualizer:
         self.create_world_map()
         self.create_scatter_gdp_vs_ai()
         self.create_top_countries_bar()
+        charts = 3
+        if self.create_rolling_correlation_chart() is not None:
+            charts += 1
         
         print("\n" + "="*60)
         print("ALL VISUALIZATIONS COMPLETE")
         print(f"Output folder: {self.output_dir}")
-        print("Total charts: 3")
+        print(f"Total charts: {charts}")
         print("="*60)
 
-def main():
+def main(df=None):
     
-    visualizer = AIAdoptionVisualizer()
+    visualizer = AIAdoptionVisualizer(df=df)
     visualizer.create_all_visualizations()
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+"""
+World Bank Client - AI Adoption Project
+
+Batched World Bank API client. Requests many countries and indicators per
+call (country/US;CA;.../indicator/A;B;...) and keeps a bounded number of
+requests in flight over a pooled keep-alive session. A batch that fails is
+retried, then split into per-country requests, so one bad code or a
+transient error only costs the countries that still fail.
+"""
+
+import threading
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+WORLD_BANK_URL = "https://api.worldbank.org/v2"
+
+WORLD_BANK_INDICATORS = {
+    'NY.GDP.PCAP.CD': 'gdp_per_capita',
+    'SE.TER.ENRR': 'tertiary_education',
+    'IT.NET.USER.ZS': 'internet_users_pct',
+    'SP.POP.TOTL': 'population'
+}
+
+# Multi-indicator queries must name the source database (2 = WDI)
+WDI_SOURCE_ID = 2
+
+
+def make_session(max_in_flight=8, retries=3):
+
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET'])
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class WorldBankClient:
+
+    def __init__(self, base_url=WORLD_BANK_URL, session=None, max_in_flight=8,
+                 countries_per_request=25, per_page=1000, timeout=30, batch_attempts=2):
+        self.base_url = base_url.rstrip('/')
+        self.session = session or make_session(max_in_flight)
+        self.max_in_flight = max_in_flight
+        self.countries_per_request = countries_per_request
+        self.per_page = per_page
+        self.timeout = timeout
+        self.batch_attempts = batch_attempts
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+    def _url(self, country_codes, indicator_codes):
+        return f"{self.base_url}/country/{';'.join(country_codes)}/indicator/{';'.join(indicator_codes)}"
+
+    def _get_page(self, url, params, page):
+
+        response = self.session.get(url, params={**params, 'page': page}, timeout=self.timeout)
+        with self._count_lock:
+            self.request_count += 1
+        response.raise_for_status()
+        data = response.json()
+
+        if len(data) < 2:
+            # The API reports bad queries as a single message object
+            raise ValueError(f"World Bank API error: {data[0].get('message', data[0])}")
+
+        return data[0], data[1] or []
+
+    def _fetch_batch(self, country_codes, indicator_codes, date):
+
+        url = self._url(country_codes, indicator_codes)
+        params = {
+            'format': 'json',
+            'date': date,
+            'per_page': self.per_page
+        }
+        if len(indicator_codes) > 1:
+            params['source'] = WDI_SOURCE_ID
+
+        meta, rows = self._get_page(url, params, 1)
+        for page in range(2, int(meta.get('pages', 1)) + 1):
+            rows.extend(self._get_page(url, params, page)[1])
+
+        return rows
+
+    def _fetch_resilient(self, country_codes, indicator_codes, date):
+
+        # Returns (rows, failed) where failed lists (country_code, error)
+        error = None
+        for _ in range(max(1, self.batch_attempts)):
+            try:
+                return self._fetch_batch(country_codes, indicator_codes, date), []
+            except (requests.RequestException, ValueError) as e:
+                error = e
+        if len(country_codes) == 1:
+            return [], [(country_codes[0], error)]
+
+        rows, failed = [], []
+        for country_code in country_codes:
+            try:
+                rows.extend(self._fetch_batch([country_code], indicator_codes, date))
+            except (requests.RequestException, ValueError) as e:
+                failed.append((country_code, e))
+        return rows, failed
+
+    def fetch(self, country_codes, indicators=WORLD_BANK_INDICATORS, date='2022:2024',
+              on_batch=None):
+
+        country_codes = list(country_codes)
+        indicator_codes = list(indicators)
+        batches = [
+            country_codes[i:i + self.countries_per_request]
+            for i in range(0, len(country_codes), self.countries_per_request)
+        ]
+
+        # Rows arrive newest year first, so the first non-null value per
+        # (country, indicator) is the latest one, as in the per-country loop
+        values = {}
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            futures = {
+                pool.submit(self._fetch_resilient, batch, indicator_codes, date): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    rows, failed = future.result()
+                except Exception as e:
+                    print(f"  {batch[0]}..{batch[-1]}: {str(e)}")
+                    continue
+                for country_code, error in failed:
+                    print(f"  {country_code}: {str(error)}")
+
+                batch_values = {}
+                for item in rows:
+                    if item.get('value') is None:
+                        continue
+                    key = (item['country']['id'], item['indicator']['id'])
+                    batch_values.setdefault(key, item['value'])
+
+                values.update(batch_values)
+                if on_batch is not None:
+                    # Countries that still failed are left out, so the
+                    # journal retries them on the next run
+                    failed_codes = {country_code for country_code, _ in failed}
+                    on_batch([code for code in batch if code not in failed_codes], batch_values)
+
+        return values
+
+    def fetch_frame(self, country_codes, indicators=WORLD_BANK_INDICATORS, date='2022:2024'):
+
+        country_codes = list(country_codes)
+        values = self.fetch(country_codes, indicators, date)
+        return pd.DataFrame(indicator_rows(country_codes, indicators, values))
+
+
+def country_indicators(country_code, indicators, values):
+    return {
+        indicator_name: values[(country_code, indicator_code)]
+        for indicator_code, indicator_name in indicators.items()
+        if (country_code, indicator_code) in values
+    }
+
+
+def indicator_rows(country_codes, indicators, values):
+
+    all_data = []
+    for country_code in country_codes:
+        country_data = {'country_code': country_code,
+                        **country_indicators(country_code, indicators, values)}
+        if len(country_data) > 1:
+            all_data.append(country_data)
+
+    return all_data
@@ -0,0 +1,176 @@
+"""
+World Bank Stub Server - AI Adoption Project
+
+Local stand-in for api.worldbank.org used to benchmark the collection
+client offline. Serves deterministic indicator values with configurable
+per-request latency, for both the single and the batched URL forms.
+
+Usage:
+    python scripts/world_bank_stub.py            # benchmark old vs batched client
+"""
+
+import json
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+import requests
+
+from world_bank_client import WorldBankClient, WORLD_BANK_INDICATORS
+
+
+def stub_value(country_code, indicator_code, year):
+
+    digest = hashlib.sha256(f"{country_code}|{indicator_code}|{year}".encode()).digest()
+    # Leave roughly one in eight values empty, like the real API
+    if digest[0] < 32:
+        return None
+    return round(int.from_bytes(digest[1:5], 'big') / 2**32 * 1000, 4)
+
+
+def stub_rows(country_codes, indicator_codes, first_year, last_year):
+
+    rows = []
+    for country_code in country_codes:
+        for indicator_code in indicator_codes:
+            for year in range(last_year, first_year - 1, -1):
+                rows.append({
+                    'indicator': {'id': indicator_code, 'value': indicator_code},
+                    'country': {'id': country_code, 'value': country_code},
+                    'countryiso3code': '',
+                    'date': str(year),
+                    'value': stub_value(country_code, indicator_code, year),
+                    'unit': '',
+                    'obs_status': '',
+                    'decimal': 0
+                })
+    return rows
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        time.sleep(self.server.latency)
+        with self.server.count_lock:
+            self.server.request_count += 1
+
+        # /v2/country/{codes}/indicator/{codes}
+        if len(parts) != 5 or parts[1] != 'country' or parts[3] != 'indicator':
+            self._send(404, [{'message': [{'value': 'Unknown endpoint'}]}])
+            return
+
+        country_codes = parts[2].split(';')
+        indicator_codes = parts[4].split(';')
+        first_year, last_year = (int(y) for y in params.get('date', '2022:2024').split(':'))
+        per_page = int(params.get('per_page', 50))
+        page = int(params.get('page', 1))
+
+        rows = stub_rows(country_codes, indicator_codes, first_year, last_year)
+        pages = max(1, -(-len(rows) // per_page))
+        meta = {'page': page, 'pages': pages, 'per_page': per_page, 'total': len(rows)}
+        self._send(200, [meta, rows[(page - 1) * per_page:page * per_page]])
+
+    def _send(self, status, payload):
+
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WorldBankStubServer:
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05):
+        self.httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.request_count = 0
+        self.httpd.count_lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def sequential_fetch(base_url, country_codes, indicators):
+
+    # Mirrors the original one-request-per-unit loop (without the sleeps)
+    all_data = []
+    for country_code in country_codes:
+        country_data = {'country_code': country_code}
+        for indicator_code, indicator_name in indicators.items():
+            response = requests.get(
+                f"{base_url}/country/{country_code}/indicator/{indicator_code}",
+                params={'format': 'json', 'date': '2022:2024', 'per_page': 100},
+                timeout=10
+            )
+            data = response.json()
+            if len(data) > 1 and data[1]:
+                values = [item['value'] for item in data[1] if item['value'] is not None]
+                if values:
+                    country_data[indicator_name] = values[0]
+        if len(country_data) > 1:
+            all_data.append(country_data)
+    return all_data
+
+
+def main():
+
+    from countries import REGISTRY
+    country_codes = list(REGISTRY.iso2)
+
+    print("="*60)
+    print("WORLD BANK CLIENT BENCHMARK (local stub)")
+    print("="*60)
+
+    with WorldBankStubServer(latency=0.05) as server:
+        start = time.time()
+        baseline = sequential_fetch(server.base_url, country_codes, WORLD_BANK_INDICATORS)
+        seq_time = time.time() - start
+        seq_requests = server.request_count
+        print(f"\nSequential: {seq_requests} requests in {seq_time:.2f}s "
+              f"({seq_requests/seq_time:.1f} req/s)")
+
+        client = WorldBankClient(base_url=server.base_url, countries_per_request=10, per_page=50)
+        start = time.time()
+        df = client.fetch_frame(country_codes, WORLD_BANK_INDICATORS)
+        batch_time = time.time() - start
+        print(f"Batched:    {client.request_count} requests in {batch_time:.2f}s "
+              f"({client.request_count/batch_time:.1f} req/s)")
+
+    same = pd.DataFrame(baseline).equals(df)
+    print(f"\nSpeedup: {seq_time/batch_time:.1f}x, identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()